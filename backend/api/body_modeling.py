@@ -1,15 +1,27 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from typing import Optional
 import uuid
 import os
-import aiofiles
+import numpy as np
 from datetime import datetime
 
 from services.body_modeling import body_modeling_service
+from utils.file_io import (
+    read_upload, sniff_image_extension, run_io, submit_io, write_bytes_atomic, delete_by_id
+)
+from utils.json_response import json_response
+from db.models_index import models_index
+from utils.body_model_store import (
+    BODY_MODELS_DIR, model_path_for, save_body_model, load_body_model, load_body_mesh,
+    invalidate_body_model
+)
 
 router = APIRouter()
 
+# Whether models saved before the index existed have been added to it
+_index_synced = False
+
 @router.post("/upload")
 async def upload_body_image(
     file: UploadFile = File(...),
@@ -22,23 +34,18 @@ async def upload_body_image(
     Upload user body image and create 3D model
     """
     try:
-        # Validate file type
-        if not file.content_type.startswith('image/'):
+        # Validate file type from its content instead of the client-supplied headers
+        ext = await sniff_image_extension(file)
+        if ext is None:
             raise HTTPException(status_code=400, detail="File must be an image")
         
-        # Read file data
-        file_data = await file.read()
-        
         # Generate unique ID
-        model_id = str(uuid.uuid4())
-        original_filename = f"{model_id}_body_original.{file.filename.split('.')[-1]}"
+        model_id = uuid.uuid4().hex
         
-        # Save original file
-        os.makedirs("uploads/body_models", exist_ok=True)
-        original_path = f"uploads/body_models/{original_filename}"
-        
-        async with aiofiles.open(original_path, 'wb') as f:
-            await f.write(file_data)
+        # Save original file while the model is built from the same bytes
+        original_path = BODY_MODELS_DIR / f"{model_id}_body_original{ext}"
+        file_data = await read_upload(file)
+        save_original = submit_io(original_path.write_bytes, file_data)
         
         # Create 3D body model
         try:
@@ -47,18 +54,15 @@ async def upload_body_image(
             )
             
             # Save model data
-            model_filename = f"{model_id}_model.json"
-            model_path = f"uploads/body_models/{model_filename}"
-            
-            async with aiofiles.open(model_path, 'w') as f:
-                import json
-                await f.write(json.dumps(body_model, indent=2))
+            model_path = model_path_for(model_id)
+            file_size = await save_body_model(model_id, body_model)
+            await models_index.upsert(model_id, file_size=file_size, **_model_summary(body_model))
             
             result = {
                 "model_id": model_id,
                 "original_filename": file.filename,
-                "original_path": original_path,
-                "model_path": model_path,
+                "original_path": str(original_path),
+                "model_path": str(model_path),
                 "user_data": {
                     "height": height,
                     "weight": weight,
@@ -73,37 +77,57 @@ async def upload_body_image(
         except Exception as e:
             result = {
                 "model_id": model_id,
-                "original_path": original_path,
+                "original_path": str(original_path),
                 "modeling_error": str(e),
                 "status": "failed"
             }
         
-        return JSONResponse(content=result)
+        await save_original
+        # Returned as ORJSONResponse directly, since the mesh holds NumPy arrays
+        # that FastAPI's jsonable_encoder cannot handle
+        return ORJSONResponse(result)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Body model creation failed: {str(e)}")
 
+@router.get("/list")
+async def list_body_models():
+    """
+    List all created body models
+    """
+    global _index_synced
+    
+    try:
+        if not _index_synced:
+            await _index_unindexed_models()
+            _index_synced = True
+        
+        models = await models_index.list_models()
+        
+        return {"models": models}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list models: {str(e)}")
+
 @router.get("/{model_id}")
-async def get_body_model(model_id: str):
+async def get_body_model(model_id: str, pretty: bool = False):
     """
     Get existing body model data
     """
     try:
-        model_path = f"uploads/body_models/{model_id}_model.json"
-        
-        if not os.path.exists(model_path):
+        # Read model data; the store's stat doubles as the existence check
+        try:
+            model_data = await load_body_model(model_id)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="Body model not found")
         
-        # Read model data
-        async with aiofiles.open(model_path, 'r') as f:
-            import json
-            model_data = json.loads(await f.read())
-        
-        return JSONResponse(content={
+        return json_response({
             "model_id": model_id,
             "body_model": model_data,
             "retrieved_at": datetime.now().isoformat()
-        })
+        }, pretty=pretty)
         
     except HTTPException:
         raise
@@ -123,16 +147,12 @@ async def update_body_measurements(
     Update body measurements and regenerate model
     """
     try:
-        model_path = f"uploads/body_models/{model_id}_model.json"
-        
-        if not os.path.exists(model_path):
+        # Read existing model; the mesh is regenerated below, so skip loading it
+        try:
+            model_data = await load_body_model(model_id, include_mesh=False)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="Body model not found")
         
-        # Read existing model
-        async with aiofiles.open(model_path, 'r') as f:
-            import json
-            model_data = json.loads(await f.read())
-        
         # Update measurements
         measurements = model_data.get("measurements", {})
         
@@ -149,23 +169,23 @@ async def update_body_measurements(
         
         # Regenerate model parameters with new measurements
         if "landmarks" in model_data:
-            updated_params = await body_modeling_service.generate_3d_model_params(
+            updated_params = body_modeling_service.generate_3d_model_params(
                 model_data["landmarks"], measurements
             )
             model_data["model_params"] = updated_params
             
             # Regenerate mesh
-            updated_mesh = await body_modeling_service.create_body_mesh(updated_params)
+            updated_mesh = body_modeling_service.create_body_mesh(updated_params)
             model_data["mesh_data"] = updated_mesh
         
         model_data["measurements"] = measurements
         model_data["updated_at"] = datetime.now().isoformat()
         
         # Save updated model
-        async with aiofiles.open(model_path, 'w') as f:
-            await f.write(json.dumps(model_data, indent=2))
+        file_size = await save_body_model(model_id, model_data)
+        await models_index.upsert(model_id, file_size=file_size, **_model_summary(model_data))
         
-        return JSONResponse(content={
+        return ORJSONResponse({
             "model_id": model_id,
             "updated_measurements": measurements,
             "body_model": model_data,
@@ -177,84 +197,26 @@ async def update_body_measurements(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update measurements: {str(e)}")
 
-@router.get("/list")
-async def list_body_models():
-    """
-    List all created body models
-    """
-    try:
-        models_dir = "uploads/body_models"
-        if not os.path.exists(models_dir):
-            return JSONResponse(content={"models": []})
-        
-        models = []
-        files = os.listdir(models_dir)
-        
-        # Find model files
-        model_files = [f for f in files if f.endswith('_model.json')]
-        
-        for model_file in model_files:
-            model_id = model_file.replace('_model.json', '')
-            model_path = os.path.join(models_dir, model_file)
-            
-            # Get basic info
-            stat = os.stat(model_path)
-            
-            try:
-                # Try to read model data for additional info
-                async with aiofiles.open(model_path, 'r') as f:
-                    import json
-                    model_data = json.loads(await f.read())
-                
-                body_type = model_data.get("model_params", {}).get("body_type", "unknown")
-                height = model_data.get("measurements", {}).get("estimated_height", None)
-                
-            except Exception:
-                body_type = "unknown"
-                height = None
-            
-            models.append({
-                "model_id": model_id,
-                "body_type": body_type,
-                "estimated_height": height,
-                "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                "modified_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                "file_size": stat.st_size
-            })
-        
-        # Sort by creation time
-        models.sort(key=lambda x: x["created_at"], reverse=True)
-        
-        return JSONResponse(content={"models": models})
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to list models: {str(e)}")
-
 @router.delete("/{model_id}")
 async def delete_body_model(model_id: str):
     """
     Delete body model and associated files
     """
     try:
-        models_dir = "uploads/body_models"
-        deleted_files = []
-        
         # Find and delete all files with this ID
-        if os.path.exists(models_dir):
-            for filename in os.listdir(models_dir):
-                if filename.startswith(model_id):
-                    file_path = os.path.join(models_dir, filename)
-                    os.remove(file_path)
-                    deleted_files.append(filename)
+        deleted_files = await delete_by_id(BODY_MODELS_DIR, model_id)
+        invalidate_body_model(model_id)
         
         if not deleted_files:
             raise HTTPException(status_code=404, detail="Body model not found")
         
-        return JSONResponse(content={
+        await models_index.delete(model_id)
+        
+        return {
             "model_id": model_id,
             "deleted_files": deleted_files,
             "deleted_at": datetime.now().isoformat()
-        })
+        }
         
     except HTTPException:
         raise
@@ -264,62 +226,84 @@ async def delete_body_model(model_id: str):
 @router.post("/{model_id}/export")
 async def export_body_model(model_id: str, format: str = "obj"):
     """
-    Export body model in specified format (obj, ply, etc.)
+    Export body model in specified format (obj, ply, etc.) and return the file
     """
     try:
-        model_path = f"uploads/body_models/{model_id}_model.json"
-        
-        if not os.path.exists(model_path):
+        # Read mesh arrays straight from the NPZ, skipping the JSON round trip
+        try:
+            mesh = await load_body_mesh(model_id)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="Body model not found")
-        
-        # Read model data
-        async with aiofiles.open(model_path, 'r') as f:
-            import json
-            model_data = json.loads(await f.read())
-        
-        mesh_data = model_data.get("mesh_data")
-        if not mesh_data:
+        if mesh is None:
             raise HTTPException(status_code=400, detail="No mesh data available")
         
         # Export based on format
         if format.lower() == "obj":
-            obj_content = await _export_to_obj(mesh_data)
+            obj_content = await _export_to_obj(*mesh)
             export_filename = f"{model_id}_body.obj"
         else:
             raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
         
-        # Save export file
-        export_path = f"uploads/body_models/{export_filename}"
-        async with aiofiles.open(export_path, 'w') as f:
-            await f.write(obj_content)
+        # Save export file and send it with sendfile instead of a JSON envelope
+        export_path = BODY_MODELS_DIR / export_filename
+        await write_bytes_atomic(export_path, obj_content.encode())
         
-        return JSONResponse(content={
-            "model_id": model_id,
-            "export_path": export_path,
-            "format": format,
-            "exported_at": datetime.now().isoformat()
-        })
+        return FileResponse(export_path, media_type="model/obj", filename=export_filename)
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
 
-async def _export_to_obj(mesh_data: dict) -> str:
-    """Convert mesh data to OBJ format"""
-    vertices = mesh_data["vertices"]
-    faces = mesh_data["faces"]
-    
-    obj_lines = ["# Treads Body Model Export", ""]
+async def _export_to_obj(vertices: np.ndarray, faces: np.ndarray) -> str:
+    """Convert mesh arrays to OBJ format"""
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
     
-    # Write vertices
-    for vertex in vertices:
-        obj_lines.append(f"v {vertex[0]:.6f} {vertex[1]:.6f} {vertex[2]:.6f}")
-    
-    obj_lines.append("")
-    
-    # Write faces (OBJ uses 1-based indexing)
-    for face in faces:
-        obj_lines.append(f"f {face[0]+1} {face[1]+1} {face[2]+1}")
+    # Write vertices, then faces (OBJ uses 1-based indexing)
+    return "".join([
+        "# Treads Body Model Export\n\n",
+        _format_rows("v %.6f %.6f %.6f\n", vertices),
+        "\n",
+        _format_rows("f %d %d %d\n", faces + 1)
+    ])
+
+def _format_rows(row_format: str, rows: np.ndarray) -> str:
+    """Format every row of an array in a single %-formatting call"""
+    return (row_format * len(rows)) % tuple(rows.ravel().tolist())
+
+def _model_summary(model_data: dict) -> dict:
+    """Extract the fields shown by list_body_models"""
+    return {
+        "body_type": model_data.get("model_params", {}).get("body_type", "unknown"),
+        "estimated_height": model_data.get("measurements", {}).get("estimated_height", None)
+    }
+
+def _scan_unindexed_models_sync(indexed) -> list:
+    """List (model_id, stat) for model documents not in the index, in one scandir pass"""
+    with os.scandir(BODY_MODELS_DIR) as entries:
+        return [
+            (entry.name[:-len('_model.json')], entry.stat())
+            for entry in entries
+            if entry.name.endswith('_model.json')
+            and entry.name[:-len('_model.json')] not in indexed
+        ]
+
+async def _index_unindexed_models():
+    """Add models saved before the SQLite index existed"""
+    indexed = await models_index.model_ids()
+    unindexed = await run_io(_scan_unindexed_models_sync, indexed)
     
-    return "\n".join(obj_lines)
\ No newline at end of file
+    for model_id, stat in unindexed:
+        try:
+            summary = _model_summary(await load_body_model(model_id, include_mesh=False))
+        except Exception:
+            summary = {"body_type": "unknown", "estimated_height": None}
+        
+        await models_index.upsert(
+            model_id,
+            file_size=stat.st_size,
+            created_at=datetime.fromtimestamp(stat.st_ctime).isoformat(),
+            modified_at=datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            **summary
+        )
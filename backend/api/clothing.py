@@ -1,16 +1,25 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException, Form
-from fastapi.responses import JSONResponse
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import uuid
 import os
-import aiofiles
+from collections import defaultdict
+from pathlib import Path
 from datetime import datetime
 
 from services.background_removal import background_removal_service
 from services.clothing_detection import clothing_detection_service
+from utils.file_io import (
+    run_io, save_upload, sniff_image_extension, read_bytes, write_bytes, delete_by_id
+)
 
 router = APIRouter()
 
+CLOTHING_DIR = Path("uploads/clothing")
+CLOTHING_DIR.mkdir(parents=True, exist_ok=True)
+
+# Last list_clothing_items result, keyed by the clothing directory mtime
+_list_cache = {"mtime_ns": None, "items": []}
+
 @router.post("/upload")
 async def upload_clothing_image(
     file: UploadFile = File(...),
@@ -21,28 +30,22 @@ async def upload_clothing_image(
     Upload clothing image with optional background removal and analysis
     """
     try:
-        # Validate file type
-        if not file.content_type.startswith('image/'):
+        # Validate file type from its content instead of the client-supplied headers
+        ext = await sniff_image_extension(file)
+        if ext is None:
             raise HTTPException(status_code=400, detail="File must be an image")
         
-        # Read file data
-        file_data = await file.read()
-        
         # Generate unique filename
-        file_id = str(uuid.uuid4())
-        original_filename = f"{file_id}_original.{file.filename.split('.')[-1]}"
+        file_id = uuid.uuid4().hex
         
-        # Save original file
-        os.makedirs("uploads/clothing", exist_ok=True)
-        original_path = f"uploads/clothing/{original_filename}"
-        
-        async with aiofiles.open(original_path, 'wb') as f:
-            await f.write(file_data)
+        # Stream original file to disk
+        original_path = CLOTHING_DIR / f"{file_id}_original{ext}"
+        file_data = await save_upload(file, original_path)
         
         result = {
             "file_id": file_id,
             "original_filename": file.filename,
-            "original_path": original_path,
+            "original_path": str(original_path),
             "upload_time": datetime.now().isoformat()
         }
         
@@ -54,14 +57,12 @@ async def upload_clothing_image(
                 )
                 
                 # Save processed image
-                processed_filename = f"{file_id}_processed.png"
-                processed_path = f"uploads/clothing/{processed_filename}"
+                processed_path = CLOTHING_DIR / f"{file_id}_processed.png"
                 
-                async with aiofiles.open(processed_path, 'wb') as f:
-                    await f.write(processed_data)
+                await write_bytes(processed_path, processed_data)
                 
                 result.update({
-                    "processed_path": processed_path,
+                    "processed_path": str(processed_path),
                     "background_removed": True,
                     "background_removal_metadata": bg_metadata
                 })
@@ -92,8 +93,11 @@ async def upload_clothing_image(
                     "analysis_error": str(e)
                 })
         
-        return JSONResponse(content=result)
+        _list_cache["mtime_ns"] = None
+        return result
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
@@ -104,8 +108,8 @@ async def analyze_existing_clothing(file_id: str):
     """
     try:
         # Find the file
-        processed_path = f"uploads/clothing/{file_id}_processed.png"
-        original_path = f"uploads/clothing/{file_id}_original.jpg"
+        processed_path = CLOTHING_DIR / f"{file_id}_processed.png"
+        original_path = CLOTHING_DIR / f"{file_id}_original.jpg"
         
         file_path = processed_path if os.path.exists(processed_path) else original_path
         
@@ -113,17 +117,16 @@ async def analyze_existing_clothing(file_id: str):
             raise HTTPException(status_code=404, detail="Clothing image not found")
         
         # Read file
-        async with aiofiles.open(file_path, 'rb') as f:
-            file_data = await f.read()
+        file_data = await read_bytes(file_path)
         
         # Analyze
         analysis_result = await clothing_detection_service.analyze_clothing(file_data)
         
-        return JSONResponse(content={
+        return {
             "file_id": file_id,
             "analysis": analysis_result,
             "analyzed_at": datetime.now().isoformat()
-        })
+        }
         
     except HTTPException:
         raise
@@ -137,14 +140,13 @@ async def remove_background_from_existing(file_id: str, model_type: str = "cloth
     """
     try:
         # Find original file
-        original_path = f"uploads/clothing/{file_id}_original.jpg"
+        original_path = CLOTHING_DIR / f"{file_id}_original.jpg"
         
         if not os.path.exists(original_path):
             raise HTTPException(status_code=404, detail="Original image not found")
         
         # Read file
-        async with aiofiles.open(original_path, 'rb') as f:
-            file_data = await f.read()
+        file_data = await read_bytes(original_path)
         
         # Remove background
         processed_data, metadata = await background_removal_service.remove_background(
@@ -152,18 +154,17 @@ async def remove_background_from_existing(file_id: str, model_type: str = "cloth
         )
         
         # Save processed image
-        processed_filename = f"{file_id}_processed.png"
-        processed_path = f"uploads/clothing/{processed_filename}"
+        processed_path = CLOTHING_DIR / f"{file_id}_processed.png"
         
-        async with aiofiles.open(processed_path, 'wb') as f:
-            await f.write(processed_data)
+        await write_bytes(processed_path, processed_data)
+        _list_cache["mtime_ns"] = None
         
-        return JSONResponse(content={
+        return {
             "file_id": file_id,
-            "processed_path": processed_path,
+            "processed_path": str(processed_path),
             "metadata": metadata,
             "processed_at": datetime.now().isoformat()
-        })
+        }
         
     except HTTPException:
         raise
@@ -176,41 +177,16 @@ async def list_clothing_items():
     List all uploaded clothing items
     """
     try:
-        clothing_dir = "uploads/clothing"
-        if not os.path.exists(clothing_dir):
-            return JSONResponse(content={"items": []})
-        
-        items = []
-        files = os.listdir(clothing_dir)
-        
-        # Group files by ID
-        file_groups = {}
-        for filename in files:
-            if '_' in filename:
-                file_id = filename.split('_')[0]
-                if file_id not in file_groups:
-                    file_groups[file_id] = {}
-                
-                if 'original' in filename:
-                    file_groups[file_id]['original'] = filename
-                elif 'processed' in filename:
-                    file_groups[file_id]['processed'] = filename
-        
-        for file_id, files in file_groups.items():
-            item = {
-                "file_id": file_id,
-                "has_original": 'original' in files,
-                "has_processed": 'processed' in files,
-                "created_at": datetime.fromtimestamp(
-                    os.path.getctime(f"{clothing_dir}/{files.get('original', list(files.values())[0])}")
-                ).isoformat()
-            }
-            items.append(item)
-        
-        # Sort by creation time
-        items.sort(key=lambda x: x["created_at"], reverse=True)
-        
-        return JSONResponse(content={"items": items})
+        dir_mtime, items = await run_io(_scan_clothing_sync, _list_cache["mtime_ns"])
+        
+        # Directory unchanged since the last scan
+        if items is None:
+            return {"items": _list_cache["items"]}
+        
+        _list_cache["mtime_ns"] = dir_mtime
+        _list_cache["items"] = items
+        
+        return {"items": items}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list items: {str(e)}")
@@ -221,25 +197,19 @@ async def delete_clothing_item(file_id: str):
     Delete clothing item and associated files
     """
     try:
-        clothing_dir = "uploads/clothing"
-        deleted_files = []
-        
         # Find and delete all files with this ID
-        if os.path.exists(clothing_dir):
-            for filename in os.listdir(clothing_dir):
-                if filename.startswith(file_id):
-                    file_path = os.path.join(clothing_dir, filename)
-                    os.remove(file_path)
-                    deleted_files.append(filename)
+        deleted_files = await delete_by_id(CLOTHING_DIR, file_id)
         
         if not deleted_files:
             raise HTTPException(status_code=404, detail="Clothing item not found")
         
-        return JSONResponse(content={
+        _list_cache["mtime_ns"] = None
+        
+        return {
             "file_id": file_id,
             "deleted_files": deleted_files,
             "deleted_at": datetime.now().isoformat()
-        })
+        }
         
     except HTTPException:
         raise
@@ -252,11 +222,9 @@ async def get_clothing_details(file_id: str):
     Get detailed information about a clothing item
     """
     try:
-        clothing_dir = "uploads/clothing"
-        
         # Check if files exist
-        original_path = f"{clothing_dir}/{file_id}_original.jpg"
-        processed_path = f"{clothing_dir}/{file_id}_processed.png"
+        original_path = CLOTHING_DIR / f"{file_id}_original.jpg"
+        processed_path = CLOTHING_DIR / f"{file_id}_processed.png"
         
         if not os.path.exists(original_path) and not os.path.exists(processed_path):
             raise HTTPException(status_code=404, detail="Clothing item not found")
@@ -276,9 +244,62 @@ async def get_clothing_details(file_id: str):
                 "modified_at": datetime.fromtimestamp(stat.st_mtime).isoformat()
             })
         
-        return JSONResponse(content=details)
+        return details
         
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get details: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to get details: {str(e)}")
+
+def _scan_clothing_sync(known_mtime_ns: Optional[int]) -> Tuple[Optional[int], Optional[List[dict]]]:
+    """
+    List clothing items, newest first, in one directory pass
+    
+    Args:
+        known_mtime_ns: Directory mtime of the cached listing
+        
+    Returns:
+        The directory mtime and its items, or None for the items when the
+        directory is unchanged since known_mtime_ns
+    """
+    try:
+        dir_mtime = os.stat(CLOTHING_DIR).st_mtime_ns
+    except FileNotFoundError:
+        return None, []
+    
+    if dir_mtime == known_mtime_ns:
+        return dir_mtime, None
+    
+    # Group files by ID in a single directory pass
+    file_groups = defaultdict(dict)
+    with os.scandir(CLOTHING_DIR) as entries:
+        for entry in entries:
+            if '_' not in entry.name:
+                continue
+            
+            group = file_groups[entry.name.split('_')[0]]
+            if 'original' in entry.name:
+                group['original'] = entry
+            elif 'processed' in entry.name:
+                group['processed'] = entry
+            group.setdefault('first', entry)
+    
+    # Sort by creation time on the raw stat value, then format each timestamp once
+    created = sorted(
+        ((group.get('original', group['first']).stat().st_ctime, file_id, group)
+         for file_id, group in file_groups.items()),
+        key=lambda x: x[0],
+        reverse=True
+    )
+    
+    items = [
+        {
+            "file_id": file_id,
+            "has_original": 'original' in group,
+            "has_processed": 'processed' in group,
+            "created_at": datetime.fromtimestamp(ctime).isoformat()
+        }
+        for ctime, file_id, group in created
+    ]
+    
+    return dir_mtime, items
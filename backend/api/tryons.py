@@ -1,16 +1,64 @@
-from fastapi import APIRouter, HTTPException, Form
-from fastapi.responses import JSONResponse
-from typing import Optional, Dict, List
+from fastapi import APIRouter, HTTPException, Form, Header
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from typing import Optional, Dict, List, Tuple
+import asyncio
 import uuid
+from bisect import bisect_right
+from functools import lru_cache
 import os
-import aiofiles
-import json
+import time
+import numpy as np
+import orjson
+from collections import OrderedDict
 from datetime import datetime
 
-from services.body_modeling import body_modeling_service
+from utils.body_model_store import load_body_model_with_mesh
+from utils.file_io import run_io, write_bytes_atomic_sync
+from utils.json_response import json_response, compressed_json_response
 
 router = APIRouter()
 
+TRYONS_DIR = "uploads/tryons"
+CLOTHING_DIR = "uploads/clothing"
+
+os.makedirs(TRYONS_DIR, exist_ok=True)
+
+SESSION_CACHE_SIZE = 512
+CLOTHING_INDEX_TTL_SECONDS = 2.0
+
+# Parsed sessions by ID with the file mtime they were read or written at.
+# Cached dicts are shared, so handlers copy a session before changing it.
+_session_cache: "OrderedDict[str, Tuple[int, Dict]]" = OrderedDict()
+
+# File names in uploads/clothing and the monotonic time they were listed
+_clothing_index = {"listed_at": None, "names": frozenset()}
+
+# General fit recommendations by body type
+BODY_TYPE_RECOMMENDATIONS: Dict[str, Tuple[str, ...]] = {
+    "pear": ("Emphasize upper body", "Choose fitted tops", "Avoid tight bottoms"),
+    "inverted_triangle": ("Balance with wider bottoms", "Avoid shoulder emphasis"),
+    "hourglass": ("Emphasize waist", "Choose fitted silhouettes"),
+    "rectangle": ("Create curves", "Add volume and texture"),
+    "oval": ("Choose empire waists", "Avoid tight fitting clothes")
+}
+DEFAULT_FIT_RECOMMENDATIONS = ("Choose classic fit",)
+
+STYLE_TIPS = (
+    "Consider adding a belt to define your waist",
+    "This color complements your body type well",
+    "Try layering for more visual interest"
+)
+ALTERNATIVE_SUGGESTIONS = (
+    "Try a slightly looser fit for comfort",
+    "Consider similar items in different colors",
+    "Add accessories to complete the look"
+)
+
+# Shoulder width (cm) at which each next size starts
+SIZE_THRESHOLDS = (35, 40, 45, 50)
+SIZE_LABELS = ("XS", "S", "M", "L", "XL")
+
 @router.post("/create")
 async def create_tryon_session(
     body_model_id: str = Form(...),
@@ -22,25 +70,20 @@ async def create_tryon_session(
     Create a new virtual try-on session
     """
     try:
-        # Validate body model exists
-        body_model_path = f"uploads/body_models/{body_model_id}_model.json"
-        if not os.path.exists(body_model_path):
+        # Load body model through the store's cache; its stat doubles as the existence check
+        try:
+            body_model, body_mesh = await load_body_model_with_mesh(body_model_id)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="Body model not found")
         
-        # Validate clothing items exist
-        for clothing_id in clothing_ids:
-            clothing_path = f"uploads/clothing/{clothing_id}_processed.png"
-            original_path = f"uploads/clothing/{clothing_id}_original.jpg"
-            if not os.path.exists(clothing_path) and not os.path.exists(original_path):
-                raise HTTPException(status_code=404, detail=f"Clothing item {clothing_id} not found")
+        # Validate clothing items exist against one directory listing
+        missing_id = await _find_missing_clothing(clothing_ids)
+        if missing_id is not None:
+            raise HTTPException(status_code=404, detail=f"Clothing item {missing_id} not found")
         
         # Generate session ID
         session_id = str(uuid.uuid4())
         
-        # Load body model
-        async with aiofiles.open(body_model_path, 'r') as f:
-            body_model = json.loads(await f.read())
-        
         # Create try-on configuration
         tryon_config = {
             "session_id": session_id,
@@ -53,12 +96,9 @@ async def create_tryon_session(
         }
         
         # Generate virtual try-on
-        tryon_result = await _generate_virtual_tryon(body_model, clothing_ids, tryon_config)
+        tryon_result = await _generate_virtual_tryon(body_model, body_mesh, clothing_ids)
         
         # Save session data
-        os.makedirs("uploads/tryons", exist_ok=True)
-        session_path = f"uploads/tryons/{session_id}_session.json"
-        
         session_data = {
             **tryon_config,
             "tryon_result": tryon_result,
@@ -68,10 +108,9 @@ async def create_tryon_session(
             }
         }
         
-        async with aiofiles.open(session_path, 'w') as f:
-            await f.write(json.dumps(session_data, indent=2))
+        await _save_session(session_id, session_data)
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "session_id": session_id,
             "tryon_result": tryon_result,
             "fit_analysis": await _analyze_clothing_fit(body_model, clothing_ids),
@@ -84,73 +123,60 @@ async def create_tryon_session(
         raise HTTPException(status_code=500, detail=f"Try-on creation failed: {str(e)}")
 
 @router.get("/{session_id}")
-async def get_tryon_session(session_id: str):
+async def get_tryon_session(session_id: str, pretty: bool = False):
     """
     Get existing try-on session data
     """
     try:
-        session_path = f"uploads/tryons/{session_id}_session.json"
-        
-        if not os.path.exists(session_path):
-            raise HTTPException(status_code=404, detail="Try-on session not found")
+        session_data = await _load_session_or_404(session_id)
         
-        async with aiofiles.open(session_path, 'r') as f:
-            session_data = json.loads(await f.read())
-        
-        return JSONResponse(content=session_data)
+        # Sessions carry whole meshes, so encode them off the event loop
+        return await run_io(json_response, session_data, pretty)
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve session: {str(e)}")
 
+class PoseUpdate(BaseModel):
+    """JSON body for update-pose"""
+    pose_type: str
+    custom_pose_data: Optional[Dict] = None
+
 @router.post("/{session_id}/update-pose")
-async def update_tryon_pose(
-    session_id: str,
-    pose_type: str = Form(...),
-    custom_pose_data: Optional[str] = Form(None)
-):
+async def update_tryon_pose(session_id: str, update: PoseUpdate):
     """
     Update the pose for an existing try-on session
     """
     try:
-        session_path = f"uploads/tryons/{session_id}_session.json"
-        
-        if not os.path.exists(session_path):
-            raise HTTPException(status_code=404, detail="Try-on session not found")
-        
-        # Read session data
-        async with aiofiles.open(session_path, 'r') as f:
-            session_data = json.loads(await f.read())
+        # Read session data; only top-level keys change below, so a shallow copy is enough
+        session_data = dict(await _load_session_or_404(session_id))
         
         # Update pose
-        session_data["pose_type"] = pose_type
-        if custom_pose_data:
-            session_data["custom_pose_data"] = json.loads(custom_pose_data)
+        session_data["pose_type"] = update.pose_type
+        custom_pose_data = update.custom_pose_data
         
-        # Regenerate try-on with new pose
-        body_model_id = session_data["body_model_id"]
-        clothing_ids = session_data["clothing_ids"]
-        
-        # Load body model
-        body_model_path = f"uploads/body_models/{body_model_id}_model.json"
-        async with aiofiles.open(body_model_path, 'r') as f:
-            body_model = json.loads(await f.read())
-        
-        # Update body model pose if custom pose provided
-        if custom_pose_data:
-            body_model["model_params"]["pose_parameters"] = json.loads(custom_pose_data)
+        # Only a custom pose changes the try-on result; a pose type change
+        # rewrites just the session header
+        if custom_pose_data is not None:
+            session_data["custom_pose_data"] = custom_pose_data
+            
+            # Load body model and apply the custom pose
+            body_model, body_mesh = await load_body_model_with_mesh(session_data["body_model_id"])
+            body_model["model_params"]["pose_parameters"] = custom_pose_data
+            
+            # Regenerate try-on
+            session_data["tryon_result"] = await _generate_virtual_tryon(
+                body_model, body_mesh, session_data["clothing_ids"]
+            )
         
-        # Regenerate try-on
-        updated_tryon = await _generate_virtual_tryon(body_model, clothing_ids, session_data)
-        session_data["tryon_result"] = updated_tryon
+        updated_tryon = session_data["tryon_result"]
         session_data["updated_at"] = datetime.now().isoformat()
         
         # Save updated session
-        async with aiofiles.open(session_path, 'w') as f:
-            await f.write(json.dumps(session_data, indent=2))
+        await _save_session(session_id, session_data, include_tryon=custom_pose_data is not None)
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "session_id": session_id,
             "updated_tryon": updated_tryon,
             "updated_at": session_data["updated_at"]
@@ -167,43 +193,34 @@ async def add_clothing_to_tryon(session_id: str, clothing_id: str = Form(...)):
     Add additional clothing item to existing try-on session
     """
     try:
-        session_path = f"uploads/tryons/{session_id}_session.json"
-        
-        if not os.path.exists(session_path):
-            raise HTTPException(status_code=404, detail="Try-on session not found")
+        # Read session data
+        session_data = await _load_session_or_404(session_id)
         
         # Validate clothing exists
-        clothing_path = f"uploads/clothing/{clothing_id}_processed.png"
-        original_path = f"uploads/clothing/{clothing_id}_original.jpg"
-        if not os.path.exists(clothing_path) and not os.path.exists(original_path):
+        if await _find_missing_clothing([clothing_id]) is not None:
             raise HTTPException(status_code=404, detail="Clothing item not found")
         
-        # Read session data
-        async with aiofiles.open(session_path, 'r') as f:
-            session_data = json.loads(await f.read())
-        
-        # Add clothing to session
+        # Add clothing to a copy of the session, leaving the cached one untouched
         if clothing_id not in session_data["clothing_ids"]:
-            session_data["clothing_ids"].append(clothing_id)
+            session_data = {
+                **session_data,
+                "clothing_ids": session_data["clothing_ids"] + [clothing_id]
+            }
             
             # Regenerate try-on
             body_model_id = session_data["body_model_id"]
-            body_model_path = f"uploads/body_models/{body_model_id}_model.json"
-            
-            async with aiofiles.open(body_model_path, 'r') as f:
-                body_model = json.loads(await f.read())
+            body_model, body_mesh = await load_body_model_with_mesh(body_model_id)
             
             updated_tryon = await _generate_virtual_tryon(
-                body_model, session_data["clothing_ids"], session_data
+                body_model, body_mesh, session_data["clothing_ids"]
             )
             session_data["tryon_result"] = updated_tryon
             session_data["updated_at"] = datetime.now().isoformat()
             
             # Save updated session
-            async with aiofiles.open(session_path, 'w') as f:
-                await f.write(json.dumps(session_data, indent=2))
+            await _save_session(session_id, session_data)
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "session_id": session_id,
             "clothing_ids": session_data["clothing_ids"],
             "updated_tryon": session_data["tryon_result"]
@@ -215,18 +232,12 @@ async def add_clothing_to_tryon(session_id: str, clothing_id: str = Form(...)):
         raise HTTPException(status_code=500, detail=f"Failed to add clothing: {str(e)}")
 
 @router.get("/{session_id}/ar-data")
-async def get_ar_tryon_data(session_id: str):
+async def get_ar_tryon_data(session_id: str, accept_encoding: str = Header("")):
     """
     Get AR-optimized data for real-time try-on visualization
     """
     try:
-        session_path = f"uploads/tryons/{session_id}_session.json"
-        
-        if not os.path.exists(session_path):
-            raise HTTPException(status_code=404, detail="Try-on session not found")
-        
-        async with aiofiles.open(session_path, 'r') as f:
-            session_data = json.loads(await f.read())
+        session_data = await _load_session_or_404(session_id)
         
         # Prepare AR-optimized data
         ar_data = {
@@ -245,27 +256,155 @@ async def get_ar_tryon_data(session_id: str):
             }
         }
         
-        return JSONResponse(content=ar_data)
+        # Mesh-heavy payload, so encode and compress it off the event loop
+        return await run_io(compressed_json_response, ar_data, accept_encoding)
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get AR data: {str(e)}")
 
-async def _generate_virtual_tryon(body_model: Dict, clothing_ids: List[str], config: Dict) -> Dict:
+async def _clothing_names(refresh: bool = False) -> frozenset:
+    """File names in uploads/clothing, listed at most once per CLOTHING_INDEX_TTL_SECONDS"""
+    now = time.monotonic()
+    listed_at = _clothing_index["listed_at"]
+    if not refresh and listed_at is not None and now - listed_at < CLOTHING_INDEX_TTL_SECONDS:
+        return _clothing_index["names"]
+    
+    names = await run_io(_list_clothing_sync)
+    _clothing_index["listed_at"] = now
+    _clothing_index["names"] = names
+    return names
+
+def _list_clothing_sync() -> frozenset:
+    """List uploads/clothing in a single directory pass"""
+    try:
+        with os.scandir(CLOTHING_DIR) as entries:
+            return frozenset(entry.name for entry in entries)
+    except FileNotFoundError:
+        return frozenset()
+
+async def _find_missing_clothing(clothing_ids: List[str]) -> Optional[str]:
+    """
+    Return the first clothing ID with neither a processed nor an original image
+    
+    A miss re-lists the directory once, so items uploaded within the TTL are found.
+    """
+    for refresh in (False, True):
+        names = await _clothing_names(refresh)
+        missing_id = next(
+            (clothing_id for clothing_id in clothing_ids
+             if f"{clothing_id}_processed.png" not in names
+             and f"{clothing_id}_original.jpg" not in names),
+            None
+        )
+        if missing_id is None:
+            return None
+    
+    return missing_id
+
+def _session_path(session_id: str) -> str:
+    """Path of a try-on session header (everything except the try-on result)"""
+    return f"{TRYONS_DIR}/{session_id}_session.json"
+
+def _tryon_path(session_id: str) -> str:
+    """Path of a session's try-on result, which carries the meshes"""
+    return f"{TRYONS_DIR}/{session_id}_tryon.json"
+
+async def _load_session_or_404(session_id: str) -> Dict:
+    """
+    Load a try-on session, reusing the parsed data while the file is unchanged
+    
+    The returned dict may be shared with other requests and must not be modified.
+    The stat that validates the cache doubles as the existence check.
+    """
+    session_path = _session_path(session_id)
+    try:
+        mtime_ns = (await run_io(os.stat, session_path)).st_mtime_ns
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Try-on session not found")
+    
+    cached = _session_cache.get(session_id)
+    if cached is not None and cached[0] == mtime_ns:
+        _session_cache.move_to_end(session_id)
+        return cached[1]
+    
+    session_data = await run_io(_read_session_sync, session_id)
+    
+    _cache_session(session_id, mtime_ns, session_data)
+    return session_data
+
+async def _save_session(session_id: str, session_data: Dict, include_tryon: bool = True):
+    """
+    Write a try-on session and keep the cache primed with it
+    
+    Args:
+        session_id: Try-on session ID
+        session_data: Full session, including its try-on result
+        include_tryon: Set to False when the try-on result is unchanged, so
+            only the small header is rewritten
+    """
+    mtime_ns = await run_io(_write_session_sync, session_id, session_data, include_tryon)
+    _cache_session(session_id, mtime_ns, session_data)
+
+def _read_session_sync(session_id: str) -> Dict:
+    """Read a session header and re-attach its try-on result"""
+    with open(_session_path(session_id), 'rb') as f:
+        session_data = orjson.loads(f.read())
+    
+    # Sessions saved before the try-on result was split out carry it inline
+    if "tryon_result" not in session_data:
+        with open(_tryon_path(session_id), 'rb') as f:
+            session_data["tryon_result"] = orjson.loads(f.read())
+    
+    return session_data
+
+def _write_session_sync(session_id: str, session_data: Dict, include_tryon: bool) -> int:
+    """
+    Write the try-on result, then the header, so a header on disk always has
+    its result; returns the header mtime
+    """
+    tryon_path = _tryon_path(session_id)
+    if include_tryon or not os.path.exists(tryon_path):
+        write_bytes_atomic_sync(
+            tryon_path,
+            orjson.dumps(session_data["tryon_result"], option=orjson.OPT_SERIALIZE_NUMPY)
+        )
+    
+    header = {k: v for k, v in session_data.items() if k != "tryon_result"}
+    session_path = _session_path(session_id)
+    write_bytes_atomic_sync(session_path, orjson.dumps(header, option=orjson.OPT_SERIALIZE_NUMPY))
+    return os.stat(session_path).st_mtime_ns
+
+def _cache_session(session_id: str, mtime_ns: int, session_data: Dict):
+    """Store a parsed session, evicting the least recently used one when full"""
+    _session_cache[session_id] = (mtime_ns, session_data)
+    _session_cache.move_to_end(session_id)
+    if len(_session_cache) > SESSION_CACHE_SIZE:
+        _session_cache.popitem(last=False)
+
+async def _generate_virtual_tryon(
+    body_model: Dict,
+    body_mesh: Optional[Tuple[np.ndarray, np.ndarray]],
+    clothing_ids: List[str]
+) -> Dict:
     """
     Generate virtual try-on result
+    
+    Args:
+        body_model: Body model as loaded by load_body_model_with_mesh
+        body_mesh: Its (vertices, faces) arrays from the same load, or None
+        clothing_ids: Clothing items to fit to the body
     """
     try:
         # Extract body mesh and parameters
-        body_mesh = body_model.get("mesh_data", {})
+        mesh_data = body_model.get("mesh_data", {})
         body_params = body_model.get("model_params", {})
         
-        # Load and process clothing items
-        clothing_meshes = []
-        for clothing_id in clothing_ids:
-            clothing_mesh = await _process_clothing_for_tryon(clothing_id, body_params)
-            clothing_meshes.append(clothing_mesh)
+        # Load and process clothing items concurrently
+        clothing_meshes = list(await asyncio.gather(*[
+            _process_clothing_for_tryon(clothing_id, body_params) for clothing_id in clothing_ids
+        ]))
         
         # Generate anchor points for clothing attachment
         anchor_points = _generate_anchor_points(body_model, clothing_meshes)
@@ -274,12 +413,13 @@ async def _generate_virtual_tryon(body_model: Dict, clothing_ids: List[str], con
         fit_adjustments = _calculate_fit_adjustments(body_params, clothing_meshes)
         
         return {
-            "body_mesh": body_mesh,
+            "body_mesh": mesh_data,
             "clothing_meshes": clothing_meshes,
             "anchor_points": anchor_points,
             "fit_adjustments": fit_adjustments,
             "pose_landmarks": body_model.get("landmarks", {}),
-            "body_bounds": _calculate_body_bounds(body_mesh),
+            # Bounds come from the mesh arrays loaded with the model rather than the vertex lists
+            "body_bounds": _calculate_body_bounds(body_mesh[0] if body_mesh is not None else None),
             "scale_factor": body_params.get("shape_parameters", {}).get("height_scale", 1.0),
             "generated_at": datetime.now().isoformat()
         }
@@ -292,9 +432,9 @@ async def _process_clothing_for_tryon(clothing_id: str, body_params: Dict) -> Di
     Process clothing item for virtual try-on
     """
     # Load clothing analysis data (would be stored separately in real app)
-    clothing_path = f"uploads/clothing/{clothing_id}_processed.png"
-    if not os.path.exists(clothing_path):
-        clothing_path = f"uploads/clothing/{clothing_id}_original.jpg"
+    clothing_path = f"{CLOTHING_DIR}/{clothing_id}_processed.png"
+    if f"{clothing_id}_processed.png" not in await _clothing_names():
+        clothing_path = f"{CLOTHING_DIR}/{clothing_id}_original.jpg"
     
     # Create simplified clothing mesh based on clothing type and body parameters
     # This is a placeholder - in a real app you'd use sophisticated 3D clothing modeling
@@ -365,25 +505,22 @@ def _calculate_fit_adjustments(body_params: Dict, clothing_meshes: List[Dict]) -
     adjustments["clothing_specific"] = clothing_adjustments
     return adjustments
 
-def _calculate_body_bounds(body_mesh: Dict) -> Dict:
+def _calculate_body_bounds(vertices) -> Dict:
     """
-    Calculate bounding box for body mesh
+    Calculate bounding box for body mesh vertices (an (N, 3) array or None)
     """
-    vertices = body_mesh.get("vertices", [])
-    
-    if not vertices:
+    if vertices is None or len(vertices) == 0:
         return {"min": {"x": -1, "y": 0, "z": -1}, "max": {"x": 1, "y": 2, "z": 1}}
     
-    # Calculate actual bounds
-    import numpy as np
-    vertices_array = np.array(vertices)
+    # Calculate actual bounds; asarray does not copy an existing array
+    vertices_array = np.asarray(vertices)
     
-    min_bounds = np.min(vertices_array, axis=0)
-    max_bounds = np.max(vertices_array, axis=0)
+    min_x, min_y, min_z = vertices_array.min(axis=0).tolist()
+    max_x, max_y, max_z = vertices_array.max(axis=0).tolist()
     
     return {
-        "min": {"x": float(min_bounds[0]), "y": float(min_bounds[1]), "z": float(min_bounds[2])},
-        "max": {"x": float(max_bounds[0]), "y": float(max_bounds[1]), "z": float(max_bounds[2])}
+        "min": {"x": min_x, "y": min_y, "z": min_z},
+        "max": {"x": max_x, "y": max_y, "z": max_z}
     }
 
 async def _analyze_clothing_fit(body_model: Dict, clothing_ids: List[str]) -> Dict:
@@ -393,27 +530,15 @@ async def _analyze_clothing_fit(body_model: Dict, clothing_ids: List[str]) -> Di
     body_type = body_model.get("model_params", {}).get("body_type", "unknown")
     fit_recommendations = body_model.get("model_params", {}).get("fit_recommendations", {})
     
+    # Load all clothing analyses concurrently
+    clothing_analyses = await asyncio.gather(*[
+        run_io(_load_clothing_analysis_sync, clothing_id) for clothing_id in clothing_ids
+    ])
+    
     # Analyze each clothing item
     fit_analysis = {}
     
-    for clothing_id in clothing_ids:
-        # Load clothing analysis (simplified)
-        clothing_analysis_path = f"uploads/clothing/{clothing_id}_analysis.json"
-        
-        # Default analysis if file doesn't exist
-        clothing_analysis = {
-            "clothing_type": {"type": "unknown"},
-            "colors": {"dominant_color": "unknown"},
-            "material": {"material": "cotton"}
-        }
-        
-        if os.path.exists(clothing_analysis_path):
-            try:
-                async with aiofiles.open(clothing_analysis_path, 'r') as f:
-                    clothing_analysis = json.loads(await f.read())
-            except Exception:
-                pass
-        
+    for clothing_id, clothing_analysis in zip(clothing_ids, clothing_analyses):
         # Analyze fit compatibility
         clothing_type = clothing_analysis.get("clothing_type", {}).get("type", "unknown")
         
@@ -428,15 +553,42 @@ async def _analyze_clothing_fit(body_model: Dict, clothing_ids: List[str]) -> Di
     
     return fit_analysis
 
+def _load_clothing_analysis_sync(clothing_id: str) -> Dict:
+    """Load a clothing analysis (simplified), falling back to defaults if it is missing or invalid"""
+    clothing_analysis_path = f"{CLOTHING_DIR}/{clothing_id}_analysis.json"
+    
+    try:
+        with open(clothing_analysis_path, 'rb') as f:
+            return orjson.loads(f.read())
+    except Exception:
+        return {
+            "clothing_type": {"type": "unknown"},
+            "colors": {"dominant_color": "unknown"},
+            "material": {"material": "cotton"}
+        }
+
 def _calculate_fit_score(body_type: str, clothing_type: str, fit_recommendations: Dict) -> float:
     """
     Calculate fit score between body type and clothing type
     """
+    return _calculate_fit_score_cached(
+        body_type,
+        clothing_type,
+        frozenset(fit_recommendations.get("tops", ())),
+        frozenset(fit_recommendations.get("bottoms", ())),
+        frozenset(fit_recommendations.get("avoid", ()))
+    )
+
+@lru_cache(maxsize=1024)
+def _calculate_fit_score_cached(
+    body_type: str,
+    clothing_type: str,
+    recommended_tops: frozenset,
+    recommended_bottoms: frozenset,
+    avoid_items: frozenset
+) -> float:
+    """Memoized body of _calculate_fit_score, with the recommendation lists as frozensets"""
     # Simplified fit scoring
-    recommended_tops = fit_recommendations.get("tops", [])
-    recommended_bottoms = fit_recommendations.get("bottoms", [])
-    avoid_items = fit_recommendations.get("avoid", [])
-    
     score = 0.5  # Base score
     
     # Check if clothing type is recommended
@@ -449,24 +601,15 @@ def _calculate_fit_score(body_type: str, clothing_type: str, fit_recommendations
     
     return max(0.0, min(1.0, score))
 
-def _get_fit_recommendations(body_type: str, clothing_type: str) -> List[str]:
+@lru_cache(maxsize=256)
+def _get_fit_recommendations(body_type: str, clothing_type: str) -> Tuple[str, ...]:
     """
     Get specific fit recommendations for body type and clothing combination
-    """
-    recommendations = []
     
+    The result is shared between calls and must not be modified.
+    """
     # General recommendations based on body type
-    body_type_recommendations = {
-        "pear": ["Emphasize upper body", "Choose fitted tops", "Avoid tight bottoms"],
-        "inverted_triangle": ["Balance with wider bottoms", "Avoid shoulder emphasis"],
-        "hourglass": ["Emphasize waist", "Choose fitted silhouettes"],
-        "rectangle": ["Create curves", "Add volume and texture"],
-        "oval": ["Choose empire waists", "Avoid tight fitting clothes"]
-    }
-    
-    recommendations.extend(body_type_recommendations.get(body_type, ["Choose classic fit"]))
-    
-    return recommendations
+    return BODY_TYPE_RECOMMENDATIONS.get(body_type, DEFAULT_FIT_RECOMMENDATIONS)
 
 def _suggest_size(body_model: Dict, clothing_analysis: Dict) -> str:
     """
@@ -477,16 +620,7 @@ def _suggest_size(body_model: Dict, clothing_analysis: Dict) -> str:
     # Simplified size suggestion logic
     shoulder_width = measurements.get("shoulder_width", 40)  # cm
     
-    if shoulder_width < 35:
-        return "XS"
-    elif shoulder_width < 40:
-        return "S"
-    elif shoulder_width < 45:
-        return "M"
-    elif shoulder_width < 50:
-        return "L"
-    else:
-        return "XL"
+    return SIZE_LABELS[bisect_right(SIZE_THRESHOLDS, shoulder_width)]
 
 async def _get_styling_recommendations(body_model: Dict, clothing_ids: List[str]) -> Dict:
     """
@@ -496,16 +630,8 @@ async def _get_styling_recommendations(body_model: Dict, clothing_ids: List[str]
     
     recommendations = {
         "outfit_rating": 7.5,  # Out of 10
-        "style_tips": [
-            "Consider adding a belt to define your waist",
-            "This color complements your body type well",
-            "Try layering for more visual interest"
-        ],
-        "alternative_suggestions": [
-            "Try a slightly looser fit for comfort",
-            "Consider similar items in different colors",
-            "Add accessories to complete the look"
-        ],
+        "style_tips": STYLE_TIPS,
+        "alternative_suggestions": ALTERNATIVE_SUGGESTIONS,
         "body_type_specific": body_model.get("model_params", {}).get("fit_recommendations", {}),
         "confidence_score": 0.8
     }
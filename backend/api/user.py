@@ -1,14 +1,57 @@
 from fastapi import APIRouter, HTTPException, Form
 from fastapi.responses import JSONResponse
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 import uuid
 import os
-import aiofiles
-import json
+import orjson
+from bisect import bisect_right
+from collections import OrderedDict
 from datetime import datetime
 
+from api.clothing import CLOTHING_DIR
+from utils.body_model_store import latest_body_model_id, load_body_model
+from utils.file_io import run_io, read_bytes, write_bytes_atomic
+from utils.json_response import json_response
+
 router = APIRouter()
 
+USERS_DIR = "uploads/users"
+PROFILE_CACHE_SIZE = 1024
+
+os.makedirs(USERS_DIR, exist_ok=True)
+
+# Parsed profiles by user ID with the file mtime they were read at.
+# Cached dicts are shared, so handlers copy a profile before changing it.
+_profile_cache: "OrderedDict[str, Tuple[int, Dict]]" = OrderedDict()
+
+# Style categories by age bracket: under 25, under 40, and 40 and over
+AGE_THRESHOLDS = (25, 40)
+AGE_STYLE_CATEGORIES = (
+    ("trendy", "casual", "streetwear"),
+    ("professional", "smart-casual", "contemporary"),
+    ("classic", "elegant", "sophisticated")
+)
+
+GENDER_CLOTHING_SUGGESTIONS: Dict[str, Tuple[str, ...]] = {
+    "female": (
+        "Wrap dresses for flattering silhouette",
+        "High-waisted bottoms for elongating legs",
+        "Statement accessories for personality"
+    ),
+    "male": (
+        "Well-fitted blazers for professional look",
+        "Quality denim for versatile styling",
+        "Classic white shirts as wardrobe staples"
+    )
+}
+
+# (style preference, recommendation key, items), applied in this order
+STYLE_PREFERENCE_RECOMMENDATIONS = (
+    ("minimalist", "color_palette", ("black", "white", "gray", "navy", "beige")),
+    ("colorful", "color_palette", ("red", "blue", "green", "yellow", "purple")),
+    ("professional", "clothing_suggestions", ("Invest in quality blazers and dress shirts",))
+)
+
 @router.post("/profile")
 async def create_user_profile(
     name: str = Form(...),
@@ -24,6 +67,7 @@ async def create_user_profile(
     """
     try:
         user_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
         
         profile_data = {
             "user_id": user_id,
@@ -33,17 +77,13 @@ async def create_user_profile(
             "gender": gender,
             "height": height,
             "weight": weight,
-            "style_preferences": json.loads(style_preferences) if style_preferences else [],
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
+            "style_preferences": orjson.loads(style_preferences) if style_preferences else [],
+            "created_at": now,
+            "updated_at": now
         }
         
         # Save profile
-        os.makedirs("uploads/users", exist_ok=True)
-        profile_path = f"uploads/users/{user_id}_profile.json"
-        
-        async with aiofiles.open(profile_path, 'w') as f:
-            await f.write(json.dumps(profile_data, indent=2))
+        await write_bytes_atomic(_profile_path(user_id), orjson.dumps(profile_data))
         
         return JSONResponse(content={
             "user_id": user_id,
@@ -55,20 +95,14 @@ async def create_user_profile(
         raise HTTPException(status_code=500, detail=f"Profile creation failed: {str(e)}")
 
 @router.get("/{user_id}/profile")
-async def get_user_profile(user_id: str):
+async def get_user_profile(user_id: str, pretty: bool = False):
     """
     Get user profile data
     """
     try:
-        profile_path = f"uploads/users/{user_id}_profile.json"
+        profile_data = await _load_profile_or_404(user_id)
         
-        if not os.path.exists(profile_path):
-            raise HTTPException(status_code=404, detail="User profile not found")
-        
-        async with aiofiles.open(profile_path, 'r') as f:
-            profile_data = json.loads(await f.read())
-        
-        return JSONResponse(content=profile_data)
+        return json_response(profile_data, pretty=pretty)
         
     except HTTPException:
         raise
@@ -90,14 +124,8 @@ async def update_user_profile(
     Update user profile
     """
     try:
-        profile_path = f"uploads/users/{user_id}_profile.json"
-        
-        if not os.path.exists(profile_path):
-            raise HTTPException(status_code=404, detail="User profile not found")
-        
-        # Read existing profile
-        async with aiofiles.open(profile_path, 'r') as f:
-            profile_data = json.loads(await f.read())
+        # Read existing profile; only top-level keys change below, so a shallow copy is enough
+        profile_data = dict(await _load_profile_or_404(user_id))
         
         # Update fields
         if name is not None:
@@ -113,13 +141,13 @@ async def update_user_profile(
         if weight is not None:
             profile_data["weight"] = weight
         if style_preferences is not None:
-            profile_data["style_preferences"] = json.loads(style_preferences)
+            profile_data["style_preferences"] = orjson.loads(style_preferences)
         
         profile_data["updated_at"] = datetime.now().isoformat()
         
         # Save updated profile
-        async with aiofiles.open(profile_path, 'w') as f:
-            await f.write(json.dumps(profile_data, indent=2))
+        await write_bytes_atomic(_profile_path(user_id), orjson.dumps(profile_data))
+        _profile_cache.pop(user_id, None)
         
         return JSONResponse(content={
             "user_id": user_id,
@@ -133,20 +161,14 @@ async def update_user_profile(
         raise HTTPException(status_code=500, detail=f"Profile update failed: {str(e)}")
 
 @router.get("/{user_id}/wardrobe")
-async def get_user_wardrobe(user_id: str):
+async def get_user_wardrobe(user_id: str, pretty: bool = False):
     """
     Get user's virtual wardrobe (saved clothing items)
     """
     try:
-        wardrobe_path = f"uploads/users/{user_id}_wardrobe.json"
+        wardrobe_data = await _load_wardrobe(user_id)
         
-        if not os.path.exists(wardrobe_path):
-            return JSONResponse(content={"wardrobe": [], "total_items": 0})
-        
-        async with aiofiles.open(wardrobe_path, 'r') as f:
-            wardrobe_data = json.loads(await f.read())
-        
-        return JSONResponse(content=wardrobe_data)
+        return json_response(wardrobe_data, pretty=pretty)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve wardrobe: {str(e)}")
@@ -158,39 +180,31 @@ async def add_to_wardrobe(user_id: str, clothing_id: str = Form(...)):
     """
     try:
         # Validate clothing exists
-        clothing_path = f"uploads/clothing/{clothing_id}_processed.png"
-        original_path = f"uploads/clothing/{clothing_id}_original.jpg"
-        if not os.path.exists(clothing_path) and not os.path.exists(original_path):
+        if not await run_io(_clothing_exists_sync, clothing_id):
             raise HTTPException(status_code=404, detail="Clothing item not found")
         
-        wardrobe_path = f"uploads/users/{user_id}_wardrobe.json"
-        
         # Load existing wardrobe or create new
-        if os.path.exists(wardrobe_path):
-            async with aiofiles.open(wardrobe_path, 'r') as f:
-                wardrobe_data = json.loads(await f.read())
-        else:
-            wardrobe_data = {"wardrobe": [], "total_items": 0}
+        wardrobe_data = await _load_wardrobe(user_id)
         
         # Check if item already exists
         existing_item = next((item for item in wardrobe_data["wardrobe"] if item["clothing_id"] == clothing_id), None)
         
         if not existing_item:
             # Add new item
+            now = datetime.now().isoformat()
             wardrobe_item = {
                 "clothing_id": clothing_id,
-                "added_at": datetime.now().isoformat(),
+                "added_at": now,
                 "wear_count": 0,
                 "favorite": False
             }
             
             wardrobe_data["wardrobe"].append(wardrobe_item)
             wardrobe_data["total_items"] = len(wardrobe_data["wardrobe"])
-            wardrobe_data["updated_at"] = datetime.now().isoformat()
+            wardrobe_data["updated_at"] = now
             
             # Save updated wardrobe
-            async with aiofiles.open(wardrobe_path, 'w') as f:
-                await f.write(json.dumps(wardrobe_data, indent=2))
+            await write_bytes_atomic(_wardrobe_path(user_id), orjson.dumps(wardrobe_data))
             
             return JSONResponse(content={
                 "user_id": user_id,
@@ -217,24 +231,15 @@ async def get_style_recommendations(user_id: str):
     """
     try:
         # Load user profile
-        profile_path = f"uploads/users/{user_id}_profile.json"
-        if not os.path.exists(profile_path):
-            raise HTTPException(status_code=404, detail="User profile not found")
-        
-        async with aiofiles.open(profile_path, 'r') as f:
-            profile_data = json.loads(await f.read())
+        profile_data = await _load_profile_or_404(user_id)
         
         # Load user's body model if available
         body_model_data = None
-        models_dir = "uploads/body_models"
-        if os.path.exists(models_dir):
-            # Find user's most recent body model (simplified)
-            model_files = [f for f in os.listdir(models_dir) if f.endswith('_model.json')]
-            if model_files:
-                # Use most recent model
-                latest_model = max(model_files, key=lambda x: os.path.getctime(os.path.join(models_dir, x)))
-                async with aiofiles.open(os.path.join(models_dir, latest_model), 'r') as f:
-                    body_model_data = json.loads(await f.read())
+        # Find user's most recent body model (simplified)
+        latest_model_id = await latest_body_model_id()
+        if latest_model_id is not None:
+            # Only model_params are used, so skip loading the mesh
+            body_model_data = await load_body_model(latest_model_id, include_mesh=False)
         
         # Generate recommendations
         recommendations = await _generate_personalized_recommendations(profile_data, body_model_data)
@@ -250,6 +255,53 @@ async def get_style_recommendations(user_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get recommendations: {str(e)}")
 
+def _profile_path(user_id: str) -> str:
+    """Path of a user's profile document"""
+    return f"{USERS_DIR}/{user_id}_profile.json"
+
+def _wardrobe_path(user_id: str) -> str:
+    """Path of a user's wardrobe document"""
+    return f"{USERS_DIR}/{user_id}_wardrobe.json"
+
+async def _load_profile_or_404(user_id: str) -> Dict:
+    """
+    Load a user profile, reusing the parsed data while the file is unchanged
+    
+    The returned dict may be shared with other requests and must not be modified.
+    The stat that validates the cache doubles as the existence check.
+    """
+    profile_path = _profile_path(user_id)
+    try:
+        mtime_ns = (await run_io(os.stat, profile_path)).st_mtime_ns
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="User profile not found")
+    
+    cached = _profile_cache.get(user_id)
+    if cached is not None and cached[0] == mtime_ns:
+        _profile_cache.move_to_end(user_id)
+        return cached[1]
+    
+    profile_data = orjson.loads(await read_bytes(profile_path))
+    
+    _profile_cache[user_id] = (mtime_ns, profile_data)
+    if len(_profile_cache) > PROFILE_CACHE_SIZE:
+        _profile_cache.popitem(last=False)
+    return profile_data
+
+async def _load_wardrobe(user_id: str) -> Dict:
+    """Load a user's wardrobe, or an empty one if nothing has been saved yet"""
+    try:
+        return orjson.loads(await read_bytes(_wardrobe_path(user_id)))
+    except FileNotFoundError:
+        return {"wardrobe": [], "total_items": 0}
+
+def _clothing_exists_sync(clothing_id: str) -> bool:
+    """True if the clothing item has a processed or an original image"""
+    return (
+        (CLOTHING_DIR / f"{clothing_id}_processed.png").exists()
+        or (CLOTHING_DIR / f"{clothing_id}_original.jpg").exists()
+    )
+
 async def _generate_personalized_recommendations(profile_data: Dict, body_model_data: Optional[Dict]) -> Dict:
     """
     Generate personalized style recommendations
@@ -265,27 +317,10 @@ async def _generate_personalized_recommendations(profile_data: Dict, body_model_
     # Age-based recommendations
     age = profile_data.get("age")
     if age:
-        if age < 25:
-            recommendations["style_categories"].extend(["trendy", "casual", "streetwear"])
-        elif age < 40:
-            recommendations["style_categories"].extend(["professional", "smart-casual", "contemporary"])
-        else:
-            recommendations["style_categories"].extend(["classic", "elegant", "sophisticated"])
+        recommendations["style_categories"].extend(AGE_STYLE_CATEGORIES[bisect_right(AGE_THRESHOLDS, age)])
     
     # Gender-based recommendations
-    gender = profile_data.get("gender")
-    if gender == "female":
-        recommendations["clothing_suggestions"].extend([
-            "Wrap dresses for flattering silhouette",
-            "High-waisted bottoms for elongating legs",
-            "Statement accessories for personality"
-        ])
-    elif gender == "male":
-        recommendations["clothing_suggestions"].extend([
-            "Well-fitted blazers for professional look",
-            "Quality denim for versatile styling",
-            "Classic white shirts as wardrobe staples"
-        ])
+    recommendations["clothing_suggestions"].extend(GENDER_CLOTHING_SUGGESTIONS.get(profile_data.get("gender"), ()))
     
     # Body type recommendations if available
     if body_model_data:
@@ -301,11 +336,8 @@ async def _generate_personalized_recommendations(profile_data: Dict, body_model_
     
     # Style preference recommendations
     style_prefs = profile_data.get("style_preferences", [])
-    if "minimalist" in style_prefs:
-        recommendations["color_palette"].extend(["black", "white", "gray", "navy", "beige"])
-    if "colorful" in style_prefs:
-        recommendations["color_palette"].extend(["red", "blue", "green", "yellow", "purple"])
-    if "professional" in style_prefs:
-        recommendations["clothing_suggestions"].append("Invest in quality blazers and dress shirts")
+    for preference, key, items in STYLE_PREFERENCE_RECOMMENDATIONS:
+        if preference in style_prefs:
+            recommendations[key].extend(items)
     
     return recommendations
\ No newline at end of file
@@ -0,0 +1,106 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from utils.file_io import run_io
+
+class ModelsIndex:
+    """
+    SQLite index of body model metadata
+    
+    The JSON documents under uploads/body_models stay the canonical storage;
+    this is a denormalized cache so listing never has to open them.
+    """
+    def __init__(self, db_path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS body_models (
+                model_id TEXT PRIMARY KEY,
+                body_type TEXT,
+                estimated_height REAL,
+                created_at TEXT NOT NULL,
+                modified_at TEXT NOT NULL,
+                file_size INTEGER
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_body_models_created_at ON body_models (created_at)"
+        )
+        self._conn.commit()
+    
+    async def upsert(
+        self,
+        model_id: str,
+        body_type: str,
+        estimated_height: Optional[float],
+        file_size: int,
+        created_at: Optional[str] = None,
+        modified_at: Optional[str] = None
+    ):
+        """Insert a model, or refresh its metadata if it is already indexed"""
+        now = datetime.now().isoformat()
+        await run_io(
+            self._execute,
+            """
+            INSERT INTO body_models
+                (model_id, body_type, estimated_height, created_at, modified_at, file_size)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (model_id) DO UPDATE SET
+                body_type = excluded.body_type,
+                estimated_height = excluded.estimated_height,
+                modified_at = excluded.modified_at,
+                file_size = excluded.file_size
+            """,
+            (model_id, body_type, estimated_height, created_at or now, modified_at or now, file_size)
+        )
+    
+    async def delete(self, model_id: str):
+        """Remove a model from the index"""
+        await run_io(
+            self._execute, "DELETE FROM body_models WHERE model_id = ?", (model_id,)
+        )
+    
+    async def list_models(self) -> List[Dict]:
+        """All indexed models, newest first"""
+        return await run_io(self._list_models)
+    
+    async def model_ids(self) -> Set[str]:
+        """IDs of every indexed model"""
+        return await run_io(self._model_ids)
+    
+    def _execute(self, sql: str, params: tuple):
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._conn.commit()
+    
+    def _list_models(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT model_id, body_type, estimated_height, created_at, modified_at, file_size
+                FROM body_models
+                ORDER BY created_at DESC
+            """).fetchall()
+        
+        return [
+            {
+                "model_id": row[0],
+                "body_type": row[1],
+                "estimated_height": row[2],
+                "created_at": row[3],
+                "modified_at": row[4],
+                "file_size": row[5]
+            }
+            for row in rows
+        ]
+    
+    def _model_ids(self) -> Set[str]:
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT model_id FROM body_models")}
+
+# Global instance
+models_index = ModelsIndex(os.getenv("MODELS_INDEX_PATH", "models_index.db"))
@@ -1,22 +1,28 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 from typing import List, Optional
 import os
 from dotenv import load_dotenv
 
+# Loaded before the routers are imported, since services read settings such
+# as POSE_WORKERS at import time
+load_dotenv()
+
 from api.clothing import router as clothing_router
 from api.body_modeling import router as body_router
 from api.tryons import router as tryons_router
 from api.user import router as user_router
-
-load_dotenv()
+from services.body_modeling import body_modeling_service
+from services.clothing_detection import clothing_detection_service
 
 app = FastAPI(
     title="Treads Virtual Try-On API",
     description="AI-Powered Virtual Clothing Try-On Experience",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -28,7 +34,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Static files for serving images and models
+# Static files for serving images and models. Under docker-compose nginx serves
+# these paths directly with sendfile, so these mounts only handle local runs
 os.makedirs("uploads", exist_ok=True)
 os.makedirs("generated", exist_ok=True)
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
@@ -40,6 +47,13 @@ app.include_router(body_router, prefix="/api/body", tags=["body-modeling"])
 app.include_router(tryons_router, prefix="/api/tryons", tags=["try-ons"])
 app.include_router(user_router, prefix="/api/user", tags=["user"])
 
+@app.on_event("startup")
+async def warm_models():
+    # Opt-in so scripts and tests importing the app skip model loading
+    if os.getenv("WARMUP") == "1":
+        body_modeling_service.warmup()
+        clothing_detection_service.warmup()
+
 @app.get("/")
 async def root():
     return {"message": "Treads Virtual Try-On API", "version": "1.0.0"}
@@ -54,5 +68,9 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
+        # "auto" picks uvloop and httptools when installed (uvicorn[standard]),
+        # falling back to asyncio and h11 on platforms uvloop does not support
+        loop="auto",
+        http="auto",
         log_level="info"
     )
\ No newline at end of file
@@ -1,22 +1,85 @@
+import asyncio
 import io
 import numpy as np
 from PIL import Image
-from rembg import remove, new_session
+from rembg import remove
+from rembg.sessions import sessions_class
 import cv2
-from typing import Optional, Tuple
+import onnxruntime as ort
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple, Union
 import base64
 
+# rembg model used for each model type
+SESSION_MODELS = {
+    "clothing": "u2netp",  # Better for products
+    "person": "silueta",  # Better for people
+    "general": "u2net"  # General purpose
+}
+
+# Execution providers in order of preference; unavailable ones are skipped
+PREFERRED_PROVIDERS = [
+    "CUDAExecutionProvider",
+    "CoreMLExecutionProvider",
+    "DnnlExecutionProvider",
+    "CPUExecutionProvider"
+]
+ACCELERATOR_PROVIDERS = {"CUDAExecutionProvider", "CoreMLExecutionProvider"}
+
+# zlib level for PNGs encoded here; level 1 encodes several times faster than
+# PIL's default of 6 for a slightly larger file
+PNG_COMPRESS_LEVEL = 1
+
+# Inputs are shrunk to fit this many pixels on their long edge before removal.
+# The models segment at 320x320, so larger inputs only add decode, mask
+# upscaling and encode cost
+MAX_INPUT_SIDE = 1024
+
+# 3x3 structuring element for closing pinholes in alpha mattes
+EDGE_KERNEL = np.ones((3, 3), np.uint8)
+
+# Grayscale -> binary mask lookup table: non-white (< 250) pixels are foreground
+MASK_THRESHOLD_LUT = [255 if value < 250 else 0 for value in range(256)]
+
+# INT8 copies of the models written by quantize_model. They are used in place
+# of the FP32 weights when present and no accelerator is available, since the
+# integer conv kernels only pay off on CPU
+QUANTIZED_MODEL_DIR = os.getenv("MODEL_CACHE_DIR", "models")
+
+# Inference runs off the event loop on a small dedicated pool; ONNX Runtime
+# releases the GIL and parallelizes each run internally, so a couple of
+# workers keep the model busy without oversubscribing the CPU. The pool size
+# is also the cap on concurrent inferences, so GPU hosts short on memory can
+# lower it with INFERENCE_WORKERS
+DEFAULT_INFERENCE_WORKERS = min(4, max(2, (os.cpu_count() or 1) // 4))
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", DEFAULT_INFERENCE_WORKERS))
+INFERENCE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=INFERENCE_WORKERS,
+    thread_name_prefix="rembg"
+)
+
 class BackgroundRemovalService:
     def __init__(self):
-        # Initialize different models for different use cases
-        self.general_session = new_session('u2net')  # General purpose
-        self.clothing_session = new_session('u2netp')  # Better for products
-        self.person_session = new_session('silueta')  # Better for people
+        # Sessions by model name, created on first use so only the models
+        # actually requested are loaded
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+        available = ort.get_available_providers()
+        self.providers = [p for p in PREFERRED_PROVIDERS if p in available]
+        
+        # One set of options for every session. Each ORT session otherwise
+        # sizes its intra-op pool to all cores, and with several inference
+        # workers running at once those pools would fight over the CPU
+        self.session_options = ort.SessionOptions()
+        self.session_options.intra_op_num_threads = max(1, (os.cpu_count() or 1) // INFERENCE_WORKERS)
     
     async def remove_background(
         self, 
         image_data: bytes, 
-        model_type: str = "clothing"
+        model_type: str = "clothing",
+        max_side: Optional[int] = MAX_INPUT_SIDE
     ) -> Tuple[bytes, dict]:
         """
         Remove background from image
@@ -24,33 +87,41 @@ class BackgroundRemovalService:
         Args:
             image_data: Raw image bytes
             model_type: "clothing", "person", or "general"
+            max_side: Downscale larger inputs to this long edge; None keeps full resolution
             
         Returns:
             Tuple of (processed_image_bytes, metadata)
         """
         try:
-            # Select appropriate session
-            session = self._get_session(model_type)
-            
-            # Remove background
-            output_image = remove(image_data, session=session)
-            
-            # Convert to PIL for processing
-            pil_image = Image.open(io.BytesIO(output_image))
-            
-            # Get image metadata
-            metadata = self._extract_metadata(pil_image)
-            
-            # Convert back to bytes
-            img_byte_arr = io.BytesIO()
-            pil_image.save(img_byte_arr, format='PNG')
-            processed_bytes = img_byte_arr.getvalue()
-            
-            return processed_bytes, metadata
+            return await asyncio.get_running_loop().run_in_executor(
+                INFERENCE_EXECUTOR, self._remove_background_sync, image_data, model_type, max_side
+            )
             
         except Exception as e:
             raise Exception(f"Background removal failed: {str(e)}")
     
+    def _remove_background_sync(
+        self, 
+        image_data: bytes, 
+        model_type: str, 
+        max_side: Optional[int]
+    ) -> Tuple[bytes, dict]:
+        """Blocking body of remove_background, run on INFERENCE_EXECUTOR"""
+        # Select appropriate session
+        session = self._get_session(model_type)
+        
+        # Remove background; rembg returns PNG bytes for bytes input and an
+        # image for image input, which then needs its one PNG encode here
+        output_image = remove(self._downscale_input(image_data, max_side), session=session)
+        if isinstance(output_image, Image.Image):
+            output_image = self._image_to_bytes(output_image, 'PNG')
+        
+        # Image.open only parses the PNG header, which is all the metadata needs,
+        # so the result is returned as-is instead of being decoded and re-encoded
+        metadata = self._extract_metadata(Image.open(io.BytesIO(output_image)))
+        
+        return output_image, metadata
+    
     async def remove_background_with_mask(
         self, 
         image_data: bytes, 
@@ -63,34 +134,44 @@ class BackgroundRemovalService:
             Tuple of (processed_image_bytes, mask_bytes, metadata)
         """
         try:
-            session = self._get_session(model_type)
-            
-            # Get original image
-            original_image = Image.open(io.BytesIO(image_data))
-            
-            # Remove background
-            output_image = remove(image_data, session=session)
-            result_image = Image.open(io.BytesIO(output_image))
-            
-            # Create mask from alpha channel
-            if result_image.mode == 'RGBA':
-                mask = result_image.split()[-1]  # Alpha channel
-            else:
-                # Create mask from non-transparent pixels
-                mask = self._create_mask_from_image(result_image)
-            
-            # Convert to bytes
-            result_bytes = self._image_to_bytes(result_image, 'PNG')
-            mask_bytes = self._image_to_bytes(mask, 'PNG')
-            
-            metadata = self._extract_metadata(result_image)
-            metadata['has_mask'] = True
-            
-            return result_bytes, mask_bytes, metadata
+            return await asyncio.get_running_loop().run_in_executor(
+                INFERENCE_EXECUTOR, self._remove_background_with_mask_sync, image_data, model_type
+            )
             
         except Exception as e:
             raise Exception(f"Background removal with mask failed: {str(e)}")
     
+    def _remove_background_with_mask_sync(
+        self, 
+        image_data: bytes, 
+        model_type: str
+    ) -> Tuple[bytes, bytes, dict]:
+        """Blocking body of remove_background_with_mask, run on INFERENCE_EXECUTOR"""
+        session = self._get_session(model_type)
+        
+        # Get original image
+        original_image = Image.open(io.BytesIO(image_data))
+        
+        # Remove background
+        output_image = remove(image_data, session=session)
+        result_image = Image.open(io.BytesIO(output_image))
+        
+        # Create mask from alpha channel
+        if result_image.mode == 'RGBA':
+            mask = result_image.split()[-1]  # Alpha channel
+        else:
+            # Create mask from non-transparent pixels
+            mask = self._create_mask_from_image(result_image)
+        
+        # rembg's output is already PNG, so only the mask needs encoding
+        result_bytes = output_image
+        mask_bytes = self._image_to_bytes(mask, 'PNG')
+        
+        metadata = self._extract_metadata(result_image)
+        metadata['has_mask'] = True
+        
+        return result_bytes, mask_bytes, metadata
+    
     async def refine_edges(self, image_data: bytes) -> bytes:
         """
         Refine edges of background-removed image for better quality
@@ -101,32 +182,70 @@ class BackgroundRemovalService:
             img = cv2.imdecode(nparr, cv2.IMREAD_UNCHANGED)
             
             if img.shape[2] == 4:  # RGBA
-                # Extract alpha channel
-                alpha = img[:, :, 3]
-                
-                # Apply morphological operations to refine edges
-                kernel = np.ones((3, 3), np.uint8)
-                alpha = cv2.morphologyEx(alpha, cv2.MORPH_CLOSE, kernel)
-                alpha = cv2.GaussianBlur(alpha, (3, 3), 0)
-                
-                # Update alpha channel
-                img[:, :, 3] = alpha
+                # Refine a contiguous copy of the alpha channel and write it back
+                img[:, :, 3] = self.refine_alpha(np.ascontiguousarray(img[:, :, 3]))
             
             # Convert back to bytes
-            _, buffer = cv2.imencode('.png', img)
+            _, buffer = cv2.imencode('.png', img, [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESS_LEVEL])
             return buffer.tobytes()
             
         except Exception as e:
             raise Exception(f"Edge refinement failed: {str(e)}")
     
+    def refine_alpha(self, alpha: np.ndarray) -> np.ndarray:
+        """
+        Close pinholes in an alpha channel and soften its edges, in place
+        
+        Callers that already hold the decoded image can use this directly and
+        skip the PNG decode/encode that refine_edges needs.
+        
+        Args:
+            alpha: Contiguous uint8 (H, W) alpha channel
+            
+        Returns:
+            The same array, refined
+        """
+        cv2.morphologyEx(alpha, cv2.MORPH_CLOSE, EDGE_KERNEL, dst=alpha)
+        cv2.GaussianBlur(alpha, (3, 3), 0, dst=alpha)
+        return alpha
+    
+    def _downscale_input(self, image_data: bytes, max_side: Optional[int]) -> Union[bytes, Image.Image]:
+        """
+        Shrink an oversized input image to max_side on its long edge
+        
+        Image.open only reads the header, so inputs within bounds are passed
+        through as the original bytes without being decoded here.
+        """
+        image = Image.open(io.BytesIO(image_data))
+        if max_side is None or max(image.size) <= max_side:
+            return image_data
+        
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        return image
+    
     def _get_session(self, model_type: str):
-        """Get appropriate rembg session based on model type"""
-        sessions = {
-            "clothing": self.clothing_session,
-            "person": self.person_session,
-            "general": self.general_session
-        }
-        return sessions.get(model_type, self.general_session)
+        """Get appropriate rembg session based on model type, loading it on first use"""
+        model_name = SESSION_MODELS.get(model_type, SESSION_MODELS["general"])
+        session = self._sessions.get(model_name)
+        if session is None:
+            with self._sessions_lock:
+                session = self._sessions.get(model_name)
+                if session is None:
+                    session = self._create_session(model_name)
+                    self._sessions[model_name] = session
+        return session
+    
+    def _create_session(self, model_name: str):
+        """Create a rembg session, preferring the INT8 model on CPU-only hosts"""
+        quantized_path = quantized_model_path(model_name)
+        if ACCELERATOR_PROVIDERS.isdisjoint(self.providers) and os.path.exists(quantized_path):
+            # u2net_custom shares the u2net pre- and post-processing used by all three models
+            return self._new_session("u2net_custom", model_path=quantized_path)
+        return self._new_session(model_name)
+    
+    def _new_session(self, model_name: str, **kwargs):
+        """Construct a rembg session directly, so it uses the shared session options"""
+        return session_class_for(model_name)(model_name, self.session_options, self.providers, **kwargs)
     
     def _extract_metadata(self, image: Image.Image) -> dict:
         """Extract metadata from processed image"""
@@ -143,20 +262,46 @@ class BackgroundRemovalService:
         if image.mode != 'RGB':
             image = image.convert('RGB')
         
-        # Convert to grayscale
-        gray = image.convert('L')
-        
-        # Create binary mask (non-white pixels)
-        mask_array = np.array(gray)
-        mask_array = (mask_array < 250).astype(np.uint8) * 255
-        
-        return Image.fromarray(mask_array, mode='L')
+        # Convert to grayscale and threshold non-white pixels in one table lookup,
+        # without round-tripping through NumPy buffers
+        return image.convert('L').point(MASK_THRESHOLD_LUT)
     
     def _image_to_bytes(self, image: Image.Image, format: str = 'PNG') -> bytes:
         """Convert PIL Image to bytes"""
         img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format=format)
+        image.save(img_byte_arr, format=format, compress_level=PNG_COMPRESS_LEVEL)
         return img_byte_arr.getvalue()
 
+def session_class_for(model_name: str):
+    """rembg session class that implements a model"""
+    return next(sc for sc in sessions_class if sc.name() == model_name)
+
+def quantized_model_path(model_name: str) -> str:
+    """Path of the INT8 copy of a rembg model"""
+    return os.path.join(QUANTIZED_MODEL_DIR, f"{model_name}_int8.onnx")
+
+def quantize_model(model_name: str) -> str:
+    """
+    Write an INT8 copy of a rembg model for CPU inference
+    
+    Run once offline (python -m services.background_removal); sessions
+    created afterwards pick the copy up.
+    
+    Returns:
+        Path of the quantized model
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    
+    model_input = session_class_for(model_name).download_models()
+    model_output = quantized_model_path(model_name)
+    
+    os.makedirs(QUANTIZED_MODEL_DIR, exist_ok=True)
+    quantize_dynamic(model_input, model_output, weight_type=QuantType.QInt8)
+    return model_output
+
 # Global instance
-background_removal_service = BackgroundRemovalService()
\ No newline at end of file
+background_removal_service = BackgroundRemovalService()
+
+if __name__ == "__main__":
+    for name in SESSION_MODELS.values():
+        print(f"Quantized {name} -> {quantize_model(name)}")
\ No newline at end of file
@@ -1,24 +1,143 @@
+import asyncio
 import cv2
 import numpy as np
 import mediapipe as mp
 from PIL import Image
-import json
 import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple, Optional, Any
-import torch
 import math
 
+# Pose estimation runs off the event loop. MediaPipe's Pose graph is not
+# thread-safe, so each worker thread lazily builds and keeps its own
+POSE_WORKERS = int(os.getenv("POSE_WORKERS", 2))
+POSE_EXECUTOR = ThreadPoolExecutor(max_workers=POSE_WORKERS, thread_name_prefix="pose")
+
+# Photos are shrunk to this long edge before pose estimation. MediaPipe runs
+# its models at 256x256 and returns normalized coordinates, so larger inputs
+# only add resize work inside the graph
+POSE_INPUT_MAX_SIDE = 640
+
+# MediaPipe pose landmark indices
+KEY_POINT_INDICES = {
+    "nose": 0,
+    "left_shoulder": 11,
+    "right_shoulder": 12,
+    "left_elbow": 13,
+    "right_elbow": 14,
+    "left_wrist": 15,
+    "right_wrist": 16,
+    "left_hip": 23,
+    "right_hip": 24,
+    "left_knee": 25,
+    "right_knee": 26,
+    "left_ankle": 27,
+    "right_ankle": 28
+}
+VISIBILITY_THRESHOLD = 0.5
+
+# Derived points, each the midpoint of a left/right pair
+CENTER_POINTS = {
+    "shoulder_center": ("left_shoulder", "right_shoulder"),
+    "hip_center": ("left_hip", "right_hip"),
+    "ankle_center": ("left_ankle", "right_ankle")
+}
+
+# Pixel measurements, each the distance between two key points
+MEASUREMENT_POINTS = {
+    "shoulder_width": ("left_shoulder", "right_shoulder"),
+    "torso_length": ("shoulder_center", "hip_center"),
+    "leg_length": ("hip_center", "ankle_center"),
+    "hip_width": ("left_hip", "right_hip")
+}
+
+# Clothing fit recommendations by body type. Shared between models, so
+# callers must not modify them
+FIT_RECOMMENDATIONS = {
+    "inverted_triangle": {
+        "tops": ["fitted", "v-neck", "scoop_neck"],
+        "bottoms": ["wide_leg", "flare", "bootcut"],
+        "avoid": ["shoulder_pads", "horizontal_stripes_top"]
+    },
+    "pear": {
+        "tops": ["boat_neck", "off_shoulder", "embellished"],
+        "bottoms": ["straight_leg", "dark_colors", "high_waisted"],
+        "avoid": ["tight_tops", "wide_hips_emphasis"]
+    },
+    "hourglass": {
+        "tops": ["fitted", "wrap_style", "belted"],
+        "bottoms": ["high_waisted", "fitted", "pencil_skirts"],
+        "avoid": ["baggy_clothes", "shapeless_silhouettes"]
+    },
+    "rectangle": {
+        "tops": ["peplum", "ruffles", "layered"],
+        "bottoms": ["wide_leg", "flare", "printed"],
+        "avoid": ["straight_lines", "boxy_cuts"]
+    },
+    "oval": {
+        "tops": ["empire_waist", "v_neck", "flowing"],
+        "bottoms": ["straight_leg", "bootcut", "dark_colors"],
+        "avoid": ["tight_fitting", "horizontal_stripes"]
+    }
+}
+DEFAULT_FIT_RECOMMENDATIONS = {
+    "tops": ["classic_fit"],
+    "bottoms": ["regular_fit"],
+    "avoid": []
+}
+
+def _build_body_mesh_template() -> Tuple[np.ndarray, np.ndarray]:
+    """Vertices of the simplified body at unit scale, and its fixed faces"""
+    # Head (simplified as sphere points)
+    vertices = [
+        [0.1 * math.cos(i * math.pi / 4), 1.7, 0.1 * math.sin(i * math.pi / 4)]
+        for i in range(8)
+    ]
+    
+    # Shoulders, waist and hips: a left/right pair at front and back
+    for half_width, y in ((0.2, 1.5), (0.15, 1.0), (0.18, 0.8)):
+        vertices.extend([
+            [-half_width, y, 0],
+            [half_width, y, 0],
+            [-half_width, y, -0.1],
+            [half_width, y, -0.1]
+        ])
+    
+    # Legs (simplified): knee and ankle
+    for leg_x in [-0.1, 0.1]:
+        for y in [0.4, 0.0]:
+            vertices.extend([
+                [leg_x, y, 0],
+                [leg_x, y, -0.1]
+            ])
+    
+    vertices = np.array(vertices)
+    faces = np.array([[i, i + 1, i + 2] for i in range(0, len(vertices) - 2, 3)])
+    faces.flags.writeable = False
+    return vertices, faces
+
+# The simplified mesh's shape never changes: only its heights and the widths
+# of three rows are scaled per model
+BODY_MESH_VERTICES, BODY_MESH_FACES = _build_body_mesh_template()
+SHOULDER_ROWS = slice(8, 12)
+WAIST_ROWS = slice(12, 16)
+HIP_ROWS = slice(16, 20)
+
 class BodyModelingService:
-    def __init__(self):
+    def __init__(self, model_complexity: int = 1, enable_segmentation: bool = False):
+        """
+        Args:
+            model_complexity: MediaPipe Pose model, 0 (lite) to 2 (heavy)
+            enable_segmentation: Also compute a segmentation mask; nothing here reads it
+        """
         # Initialize MediaPipe
         self.mp_pose = mp.solutions.pose
         self.mp_drawing = mp.solutions.drawing_utils
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=True,
-            model_complexity=2,
-            enable_segmentation=True,
-            min_detection_confidence=0.5
-        )
+        self.model_complexity = model_complexity
+        self.enable_segmentation = enable_segmentation
+        self._local = threading.local()
         
         # Body measurements estimation
         self.body_proportions = {
@@ -44,44 +163,128 @@ class BodyModelingService:
             Dictionary with body model data, measurements, and pose landmarks
         """
         try:
-            # Convert bytes to image
-            image = Image.open(io.BytesIO(image_data))
-            cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            
-            # Extract pose landmarks
-            landmarks = await self.extract_pose_landmarks(cv_image)
-            
-            if not landmarks:
-                raise Exception("Could not detect pose landmarks")
-            
-            # Calculate body measurements
-            measurements = await self.calculate_body_measurements(landmarks, user_height)
-            
-            # Generate 3D model parameters
-            model_params = await self.generate_3d_model_params(landmarks, measurements)
-            
-            # Create body mesh data
-            mesh_data = await self.create_body_mesh(model_params)
-            
-            return {
-                "landmarks": landmarks,
-                "measurements": measurements,
-                "model_params": model_params,
-                "mesh_data": mesh_data,
-                "status": "success"
-            }
+            return await asyncio.get_running_loop().run_in_executor(
+                POSE_EXECUTOR, self._create_body_model_sync, image_data, user_height
+            )
             
         except Exception as e:
             raise Exception(f"Body modeling failed: {str(e)}")
     
-    async def extract_pose_landmarks(self, image: np.ndarray) -> Optional[Dict]:
+    async def create_body_models(
+        self, 
+        images: List[bytes], 
+        user_heights: Optional[List[Optional[float]]] = None
+    ) -> List[Dict]:
+        """
+        Create body models for several photos at once
+        
+        Photos are decoded and processed concurrently across the POSE_EXECUTOR
+        workers, each with its own Pose graph.
+        
+        Args:
+            images: User photo bytes
+            user_heights: Optional height in cm for each photo
+            
+        Returns:
+            Body models in the same order as the photos
+        """
+        if user_heights is None:
+            user_heights = [None] * len(images)
+        
+        return await asyncio.gather(*(
+            self.create_body_model(image_data, user_height)
+            for image_data, user_height in zip(images, user_heights)
+        ))
+    
+    def _create_body_model_sync(self, image_data: bytes, user_height: Optional[float]) -> Dict:
+        """Blocking body of create_body_model, run on POSE_EXECUTOR"""
+        # Decode straight to the RGB array MediaPipe expects, at a working size
+        rgb_image = self._fit_pose_input(self._decode_rgb(image_data))
+        
+        # Extract pose landmarks
+        landmarks = self.extract_pose_landmarks(rgb_image)
+        
+        if not landmarks:
+            raise Exception("Could not detect pose landmarks")
+        
+        # Calculate body measurements
+        measurements = self.calculate_body_measurements(landmarks, user_height)
+        
+        # Generate 3D model parameters
+        model_params = self.generate_3d_model_params(landmarks, measurements)
+        
+        # Create body mesh data
+        mesh_data = self.create_body_mesh(model_params)
+        
+        return {
+            "landmarks": landmarks,
+            "measurements": measurements,
+            "model_params": model_params,
+            "mesh_data": mesh_data,
+            "status": "success"
+        }
+    
+    @property
+    def pose(self):
+        """This thread's MediaPipe Pose instance, built on first use"""
+        pose = getattr(self._local, "pose", None)
+        if pose is None:
+            pose = self.mp_pose.Pose(
+                static_image_mode=True,
+                model_complexity=self.model_complexity,
+                enable_segmentation=self.enable_segmentation,
+                min_detection_confidence=0.5
+            )
+            self._local.pose = pose
+        return pose
+    
+    def _decode_rgb(self, image_data: bytes) -> np.ndarray:
+        """
+        Decode image bytes into an (H, W, 3) RGB array
+        
+        EXIF orientation is ignored, as it was when decoding through PIL.
+        """
+        image = cv2.imdecode(
+            np.frombuffer(image_data, np.uint8),
+            cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION
+        )
+        if image is None:
+            # Formats this OpenCV build cannot read, such as GIF
+            return np.asarray(Image.open(io.BytesIO(image_data)).convert("RGB"))
+        
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+    
+    def _fit_pose_input(self, rgb_image: np.ndarray) -> np.ndarray:
+        """Downscale an image to POSE_INPUT_MAX_SIDE on its long edge, keeping its aspect ratio"""
+        scale = POSE_INPUT_MAX_SIDE / max(rgb_image.shape[:2])
+        if scale >= 1:
+            return rgb_image
+        return cv2.resize(rgb_image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    
+    def warmup(self):
+        """
+        Build and exercise a Pose graph on every pose worker in the background
+        
+        Moves graph construction and the first-inference allocations off the
+        first requests. The barrier makes each warmup task land on its own thread.
+        """
+        barrier = threading.Barrier(POSE_WORKERS)
+        blank_image = np.zeros((256, 256, 3), np.uint8)
+        
+        def warm_worker():
+            barrier.wait()
+            self.pose.process(blank_image)
+        
+        for _ in range(POSE_WORKERS):
+            POSE_EXECUTOR.submit(warm_worker)
+    
+    def extract_pose_landmarks(self, rgb_image: np.ndarray) -> Optional[Dict]:
         """
         Extract pose landmarks using MediaPipe
+        
+        Blocking; call from a worker thread.
         """
         try:
-            # Convert BGR to RGB
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            
             # Process image
             results = self.pose.process(rgb_image)
             
@@ -89,14 +292,15 @@ class BodyModelingService:
                 return None
             
             # Extract landmark coordinates
-            landmarks = []
-            for landmark in results.pose_landmarks.landmark:
-                landmarks.append({
+            landmarks = [
+                {
                     'x': landmark.x,
                     'y': landmark.y,
                     'z': landmark.z,
                     'visibility': landmark.visibility
-                })
+                }
+                for landmark in results.pose_landmarks.landmark
+            ]
             
             # Key body points for measurements
             key_points = self._extract_key_body_points(landmarks)
@@ -111,7 +315,7 @@ class BodyModelingService:
             print(f"Pose extraction error: {e}")
             return None
     
-    async def calculate_body_measurements(
+    def calculate_body_measurements(
         self, 
         landmarks_data: Dict, 
         user_height: Optional[float] = None
@@ -120,105 +324,89 @@ class BodyModelingService:
         Calculate body measurements from pose landmarks
         """
         try:
-            landmarks = landmarks_data["landmarks"]
             key_points = landmarks_data["key_points"]
             
-            # Calculate pixel distances between key points
-            pixel_measurements = {}
-            
-            # Shoulder width
-            if key_points["left_shoulder"] and key_points["right_shoulder"]:
-                shoulder_width_px = self._calculate_distance(
-                    key_points["left_shoulder"], 
-                    key_points["right_shoulder"]
-                )
-                pixel_measurements["shoulder_width"] = shoulder_width_px
-            
-            # Torso length (shoulder to hip)
-            if key_points["shoulder_center"] and key_points["hip_center"]:
-                torso_length_px = self._calculate_distance(
-                    key_points["shoulder_center"],
-                    key_points["hip_center"]
-                )
-                pixel_measurements["torso_length"] = torso_length_px
-            
-            # Leg length (hip to ankle)
-            if key_points["hip_center"] and key_points["ankle_center"]:
-                leg_length_px = self._calculate_distance(
-                    key_points["hip_center"],
-                    key_points["ankle_center"]
-                )
-                pixel_measurements["leg_length"] = leg_length_px
-            
-            # Hip width
-            if key_points["left_hip"] and key_points["right_hip"]:
-                hip_width_px = self._calculate_distance(
-                    key_points["left_hip"],
-                    key_points["right_hip"]
-                )
-                pixel_measurements["hip_width"] = hip_width_px
+            # Calculate pixel distances between key points, skipping any
+            # measurement whose points were not visible
+            pixel_measurements = {
+                measurement: self._calculate_distance(key_points[start], key_points[end])
+                for measurement, (start, end) in MEASUREMENT_POINTS.items()
+                if start in key_points and end in key_points
+            }
             
             # Convert to real measurements if height is provided
             real_measurements = {}
+            scale_factor = 1.0
             if user_height and "torso_length" in pixel_measurements:
-                # Use total body height in pixels as reference
-                total_height_px = self._calculate_total_body_height(key_points)
+                # Use total body height in pixels (nose to ankle center) as reference
+                nose = key_points.get("nose")
+                ankle_center = key_points.get("ankle_center")
+                total_height_px = abs(nose["y"] - ankle_center["y"]) if nose and ankle_center else 0.0
                 if total_height_px > 0:
                     scale_factor = user_height / total_height_px
-                    
-                    for measurement, px_value in pixel_measurements.items():
-                        real_measurements[measurement] = px_value * scale_factor
+                    real_measurements = {
+                        measurement: px_value * scale_factor
+                        for measurement, px_value in pixel_measurements.items()
+                    }
             
             return {
                 "pixel_measurements": pixel_measurements,
                 "real_measurements": real_measurements,
-                "scale_factor": real_measurements.get("scale_factor", 1.0),
+                "scale_factor": scale_factor,
                 "estimated_height": user_height or self._estimate_height(pixel_measurements)
             }
             
         except Exception as e:
             raise Exception(f"Measurement calculation failed: {str(e)}")
     
-    async def generate_3d_model_params(self, landmarks_data: Dict, measurements: Dict) -> Dict:
+    def generate_3d_model_params(self, landmarks_data: Dict, measurements: Dict) -> Dict:
         """
         Generate parameters for 3D body model (SMPL-like)
         """
         try:
             key_points = landmarks_data["key_points"]
             
+            # Waist is estimated from shoulders and hips, so each is scaled once and reused
+            shoulder_scale = self._calculate_shoulder_scale(measurements)
+            hip_scale = self._calculate_hip_scale(measurements)
+            
             # Basic body shape parameters
             shape_params = {
                 "height_scale": measurements.get("estimated_height", 170) / 170,  # Normalize to average
-                "shoulder_width_scale": self._calculate_shoulder_scale(measurements),
-                "waist_width_scale": self._calculate_waist_scale(measurements),
-                "hip_width_scale": self._calculate_hip_scale(measurements),
+                "shoulder_width_scale": shoulder_scale,
+                "waist_width_scale": (shoulder_scale + hip_scale) / 2 * 0.8,  # Waist typically smaller
+                "hip_width_scale": hip_scale,
                 "leg_length_scale": self._calculate_leg_scale(measurements)
             }
             
             # Pose parameters (simplified)
             pose_params = self._extract_pose_parameters(landmarks_data["landmarks"])
+            body_type = self._classify_body_type(shape_params)
             
             return {
                 "shape_parameters": shape_params,
                 "pose_parameters": pose_params,
-                "body_type": self._classify_body_type(shape_params),
-                "fit_recommendations": self._generate_fit_recommendations(shape_params)
+                "body_type": body_type,
+                "fit_recommendations": self._generate_fit_recommendations(body_type)
             }
             
         except Exception as e:
             raise Exception(f"3D model parameter generation failed: {str(e)}")
     
-    async def create_body_mesh(self, model_params: Dict) -> Dict:
+    def create_body_mesh(self, model_params: Dict) -> Dict:
         """
         Create 3D body mesh data for rendering
+        
+        Vertices and faces stay NumPy arrays: the model store writes them to
+        NPZ as-is and ORJSONResponse serializes them without boxing each value.
         """
         try:
             # Simplified mesh generation (in a real app, you'd use SMPL)
             vertices, faces = self._generate_simplified_body_mesh(model_params)
             
             return {
-                "vertices": vertices.tolist(),
-                "faces": faces.tolist(),
+                "vertices": vertices,
+                "faces": faces,
                 "vertex_count": len(vertices),
                 "face_count": len(faces),
                 "format": "obj_compatible"
@@ -229,29 +417,12 @@ class BodyModelingService:
     
     def _extract_key_body_points(self, landmarks: List[Dict]) -> Dict:
         """Extract key body points from MediaPipe landmarks"""
-        # MediaPipe pose landmark indices
-        mp_indices = {
-            "nose": 0,
-            "left_shoulder": 11,
-            "right_shoulder": 12,
-            "left_elbow": 13,
-            "right_elbow": 14,
-            "left_wrist": 15,
-            "right_wrist": 16,
-            "left_hip": 23,
-            "right_hip": 24,
-            "left_knee": 25,
-            "right_knee": 26,
-            "left_ankle": 27,
-            "right_ankle": 28
-        }
-        
         key_points = {}
         
-        for name, idx in mp_indices.items():
+        for name, idx in KEY_POINT_INDICES.items():
             if idx < len(landmarks):
                 landmark = landmarks[idx]
-                if landmark["visibility"] > 0.5:  # Only use visible landmarks
+                if landmark["visibility"] > VISIBILITY_THRESHOLD:  # Only use visible landmarks
                     key_points[name] = {
                         "x": landmark["x"],
                         "y": landmark["y"],
@@ -259,43 +430,26 @@ class BodyModelingService:
                     }
         
         # Calculate derived points
-        if "left_shoulder" in key_points and "right_shoulder" in key_points:
-            key_points["shoulder_center"] = {
-                "x": (key_points["left_shoulder"]["x"] + key_points["right_shoulder"]["x"]) / 2,
-                "y": (key_points["left_shoulder"]["y"] + key_points["right_shoulder"]["y"]) / 2,
-                "z": (key_points["left_shoulder"]["z"] + key_points["right_shoulder"]["z"]) / 2
-            }
-        
-        if "left_hip" in key_points and "right_hip" in key_points:
-            key_points["hip_center"] = {
-                "x": (key_points["left_hip"]["x"] + key_points["right_hip"]["x"]) / 2,
-                "y": (key_points["left_hip"]["y"] + key_points["right_hip"]["y"]) / 2,
-                "z": (key_points["left_hip"]["z"] + key_points["right_hip"]["z"]) / 2
-            }
-        
-        if "left_ankle" in key_points and "right_ankle" in key_points:
-            key_points["ankle_center"] = {
-                "x": (key_points["left_ankle"]["x"] + key_points["right_ankle"]["x"]) / 2,
-                "y": (key_points["left_ankle"]["y"] + key_points["right_ankle"]["y"]) / 2,
-                "z": (key_points["left_ankle"]["z"] + key_points["right_ankle"]["z"]) / 2
-            }
+        for name, (left, right) in CENTER_POINTS.items():
+            if left in key_points and right in key_points:
+                left_point = key_points[left]
+                right_point = key_points[right]
+                key_points[name] = {
+                    "x": (left_point["x"] + right_point["x"]) / 2,
+                    "y": (left_point["y"] + right_point["y"]) / 2,
+                    "z": (left_point["z"] + right_point["z"]) / 2
+                }
         
         return key_points
     
     def _calculate_distance(self, point1: Dict, point2: Dict) -> float:
         """Calculate Euclidean distance between two 3D points"""
-        return math.sqrt(
-            (point1["x"] - point2["x"]) ** 2 +
-            (point1["y"] - point2["y"]) ** 2 +
-            (point1["z"] - point2["z"]) ** 2
+        return math.hypot(
+            point1["x"] - point2["x"],
+            point1["y"] - point2["y"],
+            point1["z"] - point2["z"]
         )
     
-    def _calculate_total_body_height(self, key_points: Dict) -> float:
-        """Calculate total body height in pixels"""
-        if "nose" in key_points and "ankle_center" in key_points:
-            return abs(key_points["nose"]["y"] - key_points["ankle_center"]["y"])
-        return 0.0
-    
     def _calculate_shoulder_scale(self, measurements: Dict) -> float:
         """Calculate shoulder width scale factor"""
         pixel_measurements = measurements.get("pixel_measurements", {})
@@ -304,13 +458,6 @@ class BodyModelingService:
             return min(max(pixel_measurements["shoulder_width"] / 0.18, 0.7), 1.3)
         return 1.0
     
-    def _calculate_waist_scale(self, measurements: Dict) -> float:
-        """Calculate waist width scale factor"""
-        # Estimate based on shoulder and hip measurements
-        shoulder_scale = self._calculate_shoulder_scale(measurements)
-        hip_scale = self._calculate_hip_scale(measurements)
-        return (shoulder_scale + hip_scale) / 2 * 0.8  # Waist typically smaller
-    
     def _calculate_hip_scale(self, measurements: Dict) -> float:
         """Calculate hip width scale factor"""
         pixel_measurements = measurements.get("pixel_measurements", {})
@@ -364,121 +511,27 @@ class BodyModelingService:
         else:
             return "oval"
     
-    def _generate_fit_recommendations(self, shape_params: Dict) -> Dict:
+    def _generate_fit_recommendations(self, body_type: str) -> Dict:
         """Generate clothing fit recommendations based on body type"""
-        body_type = self._classify_body_type(shape_params)
-        
-        recommendations = {
-            "inverted_triangle": {
-                "tops": ["fitted", "v-neck", "scoop_neck"],
-                "bottoms": ["wide_leg", "flare", "bootcut"],
-                "avoid": ["shoulder_pads", "horizontal_stripes_top"]
-            },
-            "pear": {
-                "tops": ["boat_neck", "off_shoulder", "embellished"],
-                "bottoms": ["straight_leg", "dark_colors", "high_waisted"],
-                "avoid": ["tight_tops", "wide_hips_emphasis"]
-            },
-            "hourglass": {
-                "tops": ["fitted", "wrap_style", "belted"],
-                "bottoms": ["high_waisted", "fitted", "pencil_skirts"],
-                "avoid": ["baggy_clothes", "shapeless_silhouettes"]
-            },
-            "rectangle": {
-                "tops": ["peplum", "ruffles", "layered"],
-                "bottoms": ["wide_leg", "flare", "printed"],
-                "avoid": ["straight_lines", "boxy_cuts"]
-            },
-            "oval": {
-                "tops": ["empire_waist", "v_neck", "flowing"],
-                "bottoms": ["straight_leg", "bootcut", "dark_colors"],
-                "avoid": ["tight_fitting", "horizontal_stripes"]
-            }
-        }
-        
-        return recommendations.get(body_type, {
-            "tops": ["classic_fit"],
-            "bottoms": ["regular_fit"],
-            "avoid": []
-        })
+        return FIT_RECOMMENDATIONS.get(body_type, DEFAULT_FIT_RECOMMENDATIONS)
     
     def _generate_simplified_body_mesh(self, model_params: Dict) -> Tuple[np.ndarray, np.ndarray]:
         """
         Generate simplified 3D body mesh
         In a production app, you'd use SMPL or similar sophisticated models
+        
+        The returned faces array is shared and read-only.
         """
         shape_params = model_params["shape_parameters"]
         
-        # Create a simplified humanoid mesh
-        # This is a very basic representation - you'd want to use proper 3D modeling
-        
-        # Basic body proportions
-        height_scale = shape_params.get("height_scale", 1.0)
-        shoulder_scale = shape_params.get("shoulder_width_scale", 1.0)
-        waist_scale = shape_params.get("waist_width_scale", 1.0)
-        hip_scale = shape_params.get("hip_width_scale", 1.0)
-        
-        # Generate vertices for a simplified body
-        vertices = []
-        
-        # Head (simplified as sphere points)
-        head_y = 1.7 * height_scale
-        for i in range(8):
-            angle = i * math.pi / 4
-            x = 0.1 * math.cos(angle)
-            z = 0.1 * math.sin(angle)
-            vertices.append([x, head_y, z])
-        
-        # Shoulders
-        shoulder_y = 1.5 * height_scale
-        shoulder_width = 0.2 * shoulder_scale
-        vertices.extend([
-            [-shoulder_width, shoulder_y, 0],
-            [shoulder_width, shoulder_y, 0],
-            [-shoulder_width, shoulder_y, -0.1],
-            [shoulder_width, shoulder_y, -0.1]
-        ])
-        
-        # Waist
-        waist_y = 1.0 * height_scale
-        waist_width = 0.15 * waist_scale
-        vertices.extend([
-            [-waist_width, waist_y, 0],
-            [waist_width, waist_y, 0],
-            [-waist_width, waist_y, -0.1],
-            [waist_width, waist_y, -0.1]
-        ])
-        
-        # Hips
-        hip_y = 0.8 * height_scale
-        hip_width = 0.18 * hip_scale
-        vertices.extend([
-            [-hip_width, hip_y, 0],
-            [hip_width, hip_y, 0],
-            [-hip_width, hip_y, -0.1],
-            [hip_width, hip_y, -0.1]
-        ])
-        
-        # Legs (simplified)
-        for leg_x in [-0.1, 0.1]:
-            for y in [0.4, 0.0]:  # Knee and ankle
-                vertices.extend([
-                    [leg_x, y * height_scale, 0],
-                    [leg_x, y * height_scale, -0.1]
-                ])
-        
-        vertices = np.array(vertices)
-        
-        # Generate faces (triangles) - simplified
-        faces = []
-        # This would be much more complex in a real implementation
-        # For now, just create some basic faces
-        for i in range(0, len(vertices) - 2, 3):
-            faces.append([i, i + 1, i + 2])
-        
-        faces = np.array(faces)
+        # Scale the unit-proportion template
+        vertices = BODY_MESH_VERTICES.copy()
+        vertices[:, 1] *= shape_params.get("height_scale", 1.0)
+        vertices[SHOULDER_ROWS, 0] *= shape_params.get("shoulder_width_scale", 1.0)
+        vertices[WAIST_ROWS, 0] *= shape_params.get("waist_width_scale", 1.0)
+        vertices[HIP_ROWS, 0] *= shape_params.get("hip_width_scale", 1.0)
         
-        return vertices, faces
+        return vertices, BODY_MESH_FACES
 
 # Global instance
 body_modeling_service = BodyModelingService()
\ No newline at end of file
@@ -1,14 +1,65 @@
+import asyncio
 import cv2
 import numpy as np
 from PIL import Image
 import torch
-import torchvision.transforms as transforms
 from ultralytics import YOLO
-from sklearn.cluster import KMeans
-import webcolors
 from typing import Dict, List, Tuple, Optional
 import io
-import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+# k-means for dominant colors: stop after KMEANS_MAX_ITER rounds or once centers
+# move less than KMEANS_EPSILON (in 0-255 RGB units)
+KMEANS_MAX_ITER = 20
+KMEANS_EPSILON = 1.0
+KMEANS_SEED = 42
+
+# Garments whose pixels deviate less than this per RGB channel are reported as
+# a single solid color without clustering
+SOLID_COLOR_MAX_STD = 12
+
+# YOLO runs off the event loop on a single worker. An Ultralytics model keeps
+# per-call predictor state and must not be shared between threads, and several
+# images are passed to it as one batch rather than run side by side. Requests
+# that arrive while a batch is running are queued and detected together in the
+# next one
+DETECTION_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="yolo")
+
+# Decoding, color extraction and texture analysis run off the event loop on
+# their own pool, alongside YOLO; OpenCV releases the GIL for the heavy parts
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", 2))
+ANALYSIS_EXECUTOR = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix="analysis")
+
+DETECTION_WEIGHTS = "yolov8n.pt"  # Lightweight model
+DETECTION_IMAGE_SIZE = 640
+DETECTION_MAX_BATCH = 8
+
+# Run the PyTorch weights in FP16 on CUDA. Ultralytics already predicts under
+# torch.inference_mode, so no extra autograd guard is needed around the calls
+DETECTION_HALF = torch.cuda.is_available()
+
+# Side of the square thumbnail dominant colors are clustered on
+COLOR_THUMBNAIL_SIZE = 150
+
+# Photos are shrunk once to this long edge after decoding, for detection and
+# color extraction; it matches the YOLO input size, so detection loses nothing.
+# Texture analysis keeps full resolution, since downscaling smooths away the
+# fine variance the material heuristics look at
+ANALYSIS_MAX_SIDE = DETECTION_IMAGE_SIZE
+
+# YOLO class IDs that map to clothing categories. This is a simplified mapping -
+# you'd need to train a custom model or use a clothing-specific dataset
+YOLO_TO_CLOTHING = {
+    0: "t-shirt",  # person -> could be wearing t-shirt
+    # Add more mappings based on your model
+}
+
+# Exported copies of the YOLO weights written by export_detection_model. They
+# are loaded in place of the PyTorch weights when present: an FP16 TensorRT
+# engine on CUDA hosts, an FP16 OpenVINO model on CPU-only hosts
+EXPORTED_MODEL_DIR = os.getenv("MODEL_CACHE_DIR", "models")
 
 class ClothingDetectionService:
     def __init__(self):
@@ -16,6 +67,12 @@ class ClothingDetectionService:
         self.clothing_model = None
         self._load_models()
         
+        # Detection batcher: (images, future) requests waiting for the next YOLO
+        # batch, and the task draining them, both bound to the running event loop
+        self._detection_queue = None
+        self._detection_task = None
+        self._detection_loop = None
+        
         # Color mappings
         self.color_names = {
             'red': (255, 0, 0),
@@ -34,6 +91,10 @@ class ClothingDetectionService:
             'maroon': (128, 0, 0)
         }
         
+        # Palette as one array so nearest-color search is a single broadcast
+        self._palette_names = list(self.color_names.keys())
+        self._palette_rgb = np.array(list(self.color_names.values()), dtype=np.int16)
+        
         # Clothing categories
         self.clothing_categories = {
             0: "t-shirt",
@@ -67,11 +128,15 @@ class ClothingDetectionService:
         }
     
     def _load_models(self):
-        """Load AI models for clothing detection"""
+        """Load AI models for clothing detection, preferring an exported YOLO model"""
         try:
             # Load YOLO model (you can train custom model or use pretrained)
             # For now, we'll use a general object detection model
-            self.clothing_model = YOLO('yolov8n.pt')  # Lightweight model
+            exported_path = exported_model_path(detection_export_format())
+            if os.path.exists(exported_path):
+                self.clothing_model = YOLO(exported_path, task='detect')
+            else:
+                self.clothing_model = YOLO(DETECTION_WEIGHTS)
         except Exception as e:
             print(f"Warning: Could not load YOLO model: {e}")
             self.clothing_model = None
@@ -83,111 +148,274 @@ class ClothingDetectionService:
         Returns:
             Dictionary with clothing_type, colors, material, confidence scores
         """
+        return (await self.analyze_clothing_many([image_data]))[0]
+    
+    async def analyze_clothing_many(self, images: List[bytes]) -> List[Dict]:
+        """
+        Analyze several clothing images, detecting their types in one YOLO batch
+        
+        Args:
+            images: Clothing image bytes
+            
+        Returns:
+            Analyses in the same order as the images
+        """
         try:
-            # Convert bytes to PIL Image
-            image = Image.open(io.BytesIO(image_data))
+            loop = asyncio.get_running_loop()
             
-            # Parallel analysis
-            clothing_type = await self.detect_clothing_type(image)
-            colors = await self.extract_colors(image)
-            material = await self.predict_material(image)
+            # Decode each image once into a small BGR copy and a full-size grayscale one
+            decoded = await asyncio.gather(*(
+                loop.run_in_executor(ANALYSIS_EXECUTOR, self._decode_analysis_images, image_data)
+                for image_data in images
+            ))
+            bgr_images = [bgr_image for bgr_image, _ in decoded]
+            gray_images = [gray_image for _, gray_image in decoded]
             
-            return {
-                "clothing_type": clothing_type,
-                "colors": colors,
-                "material": material,
-                "analysis_confidence": self._calculate_overall_confidence(
-                    clothing_type, colors, material
-                )
-            }
+            # The analyses are independent, so colors and material run on the
+            # analysis pool while YOLO works through the batch
+            clothing_types, colors, materials = await asyncio.gather(
+                self.detect_clothing_types(bgr_images),
+                asyncio.gather(*(
+                    loop.run_in_executor(ANALYSIS_EXECUTOR, self.extract_colors, image)
+                    for image in bgr_images
+                )),
+                asyncio.gather(*(
+                    loop.run_in_executor(ANALYSIS_EXECUTOR, self.predict_material, gray_image)
+                    for gray_image in gray_images
+                ))
+            )
+            
+            return [
+                {
+                    "clothing_type": clothing_type,
+                    "colors": image_colors,
+                    "material": material,
+                    "analysis_confidence": self._calculate_overall_confidence(
+                        clothing_type, image_colors, material
+                    )
+                }
+                for clothing_type, image_colors, material in zip(clothing_types, colors, materials)
+            ]
             
         except Exception as e:
             raise Exception(f"Clothing analysis failed: {str(e)}")
     
-    async def detect_clothing_type(self, image: Image.Image) -> Dict:
+    def _decode_bgr(self, image_data: bytes) -> np.ndarray:
+        """
+        Decode image bytes to a 3-channel BGR array
+        
+        Alpha is dropped and EXIF orientation ignored, as a PIL RGB conversion
+        would. Formats OpenCV cannot read are decoded through PIL.
+        """
+        image = cv2.imdecode(
+            np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION
+        )
+        if image is None:
+            rgb_image = np.array(Image.open(io.BytesIO(image_data)).convert('RGB'))
+            return cv2.cvtColor(rgb_image, cv2.COLOR_RGB2BGR, dst=rgb_image)
+        return image
+    
+    def _decode_analysis_images(self, image_data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Decode image bytes into the buffers the analyses share
+        
+        Returns:
+            BGR copy at most ANALYSIS_MAX_SIDE on its long edge (aspect ratio
+            kept) and a full-resolution grayscale copy; the full-size BGR
+            array is released before returning
+        """
+        image = self._decode_bgr(image_data)
+        gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        
+        scale = ANALYSIS_MAX_SIDE / max(image.shape[:2])
+        if scale < 1:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return image, gray_image
+    
+    async def detect_clothing_type(self, image: np.ndarray) -> Dict:
         """
         Detect type of clothing using computer vision
         """
+        return (await self.detect_clothing_types([image]))[0]
+    
+    async def detect_clothing_types(self, images: List[np.ndarray]) -> List[Dict]:
+        """
+        Detect the clothing type of each image with a single batched YOLO call
+        
+        Images without a usable detection fall back to rule-based detection.
+        """
         try:
-            # Convert PIL to OpenCV format
-            cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+            detections = [None] * len(images)
             
             # Use YOLO for detection if available
             if self.clothing_model:
-                results = self.clothing_model(cv_image)
-                
-                # Process YOLO results
-                detections = []
-                for result in results:
-                    boxes = result.boxes
-                    if boxes is not None:
-                        for box in boxes:
-                            class_id = int(box.cls)
-                            confidence = float(box.conf)
-                            
-                            # Map to clothing categories (simplified)
-                            clothing_type = self._map_yolo_to_clothing(class_id)
-                            if clothing_type:
-                                detections.append({
-                                    "type": clothing_type,
-                                    "confidence": confidence
-                                })
-                
-                if detections:
-                    # Return highest confidence detection
-                    best_detection = max(detections, key=lambda x: x["confidence"])
-                    return best_detection
+                detections = await self._submit_detection(images)
             
             # Fallback: Rule-based detection using image properties
-            return await self._rule_based_clothing_detection(image)
+            return [
+                detection or await self._rule_based_clothing_detection(image)
+                for image, detection in zip(images, detections)
+            ]
             
         except Exception as e:
-            return {"type": "unknown", "confidence": 0.0, "error": str(e)}
+            return [{"type": "unknown", "confidence": 0.0, "error": str(e)} for _ in images]
     
-    async def extract_colors(self, image: Image.Image, num_colors: int = 5) -> Dict:
+    async def _submit_detection(self, images: List[np.ndarray]) -> List[Optional[Dict]]:
+        """Queue images for the detection batcher and wait for their detections"""
+        loop = asyncio.get_running_loop()
+        if self._detection_loop is not loop:
+            # First call, or the service is being used from a new event loop
+            self._detection_queue = asyncio.Queue()
+            self._detection_task = loop.create_task(self._run_detection_batches(self._detection_queue))
+            self._detection_loop = loop
+        
+        future = loop.create_future()
+        self._detection_queue.put_nowait((images, future))
+        return await future
+    
+    async def _run_detection_batches(self, queue: asyncio.Queue):
         """
-        Extract dominant colors from clothing image
+        Drain the detection queue, running YOLO once per batch of waiting requests
+        
+        A batch takes whatever is queued when the previous one finishes, up to
+        DETECTION_MAX_BATCH images, so an idle service adds no latency.
         """
-        try:
-            # Convert to RGB if needed
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
+        loop = asyncio.get_running_loop()
+        while True:
+            requests = [await queue.get()]
+            batch_size = len(requests[0][0])
+            while batch_size < DETECTION_MAX_BATCH and not queue.empty():
+                requests.append(queue.get_nowait())
+                batch_size += len(requests[-1][0])
             
-            # Resize for faster processing
-            image_small = image.resize((150, 150))
+            images = [image for request_images, _ in requests for image in request_images]
+            try:
+                detections = await loop.run_in_executor(
+                    DETECTION_EXECUTOR, self._detect_clothing_types_sync, images
+                )
+            except Exception as e:
+                for _, future in requests:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
             
-            # Convert to numpy array
-            img_array = np.array(image_small)
+            # Fan results back out; a future is already done if its request was cancelled
+            start = 0
+            for request_images, future in requests:
+                end = start + len(request_images)
+                if not future.done():
+                    future.set_result(detections[start:end])
+                start = end
+    
+    def _detect_clothing_types_sync(self, images: List[np.ndarray]) -> List[Optional[Dict]]:
+        """Run YOLO over a batch of BGR images on DETECTION_EXECUTOR; None where nothing mapped"""
+        # Exported engines are built for at most DETECTION_MAX_BATCH images per call
+        results = []
+        for start in range(0, len(images), DETECTION_MAX_BATCH):
+            results.extend(self.clothing_model(
+                images[start:start + DETECTION_MAX_BATCH],
+                imgsz=DETECTION_IMAGE_SIZE,
+                half=DETECTION_HALF,
+                verbose=False
+            ))
+        
+        return [self._best_detection(result.boxes) for result in results]
+    
+    def _best_detection(self, boxes) -> Optional[Dict]:
+        """
+        Highest confidence detection that maps to a clothing category
+        
+        The pick happens on the boxes' device and only the winning class and
+        confidence are copied back, instead of syncing once per box.
+        """
+        if boxes is None or len(boxes) == 0:
+            return None
+        
+        class_ids = boxes.cls
+        mapped = torch.zeros_like(class_ids, dtype=torch.bool)
+        for class_id in YOLO_TO_CLOTHING:
+            mapped |= class_ids == class_id
+        
+        # Unmapped boxes score below any real confidence; argmax keeps the first maximum
+        scores = boxes.conf.masked_fill(~mapped, -1.0)
+        best = scores.argmax()
+        confidence, class_id = torch.stack((scores[best], class_ids[best])).tolist()
+        if confidence < 0:
+            return None
+        
+        return {
+            "type": self._map_yolo_to_clothing(int(class_id)),
+            "confidence": confidence
+        }
+    
+    def warmup(self):
+        """
+        Run one blank image through YOLO on the detection worker in the background
+        
+        Moves predictor setup and the first-inference allocations off the first request.
+        """
+        if self.clothing_model:
+            blank_image = np.zeros((DETECTION_IMAGE_SIZE, DETECTION_IMAGE_SIZE, 3), np.uint8)
+            DETECTION_EXECUTOR.submit(
+                self.clothing_model, blank_image, imgsz=DETECTION_IMAGE_SIZE, half=DETECTION_HALF, verbose=False
+            )
+    
+    def extract_colors(self, image: np.ndarray, num_colors: int = 5) -> Dict:
+        """
+        Extract dominant colors from a BGR clothing image
+        
+        Blocking; call from a worker thread.
+        """
+        try:
+            # Resize for faster processing, then convert the thumbnail to RGB
+            image_small = cv2.resize(
+                image, (COLOR_THUMBNAIL_SIZE, COLOR_THUMBNAIL_SIZE), interpolation=cv2.INTER_AREA
+            )
+            img_array = cv2.cvtColor(image_small, cv2.COLOR_BGR2RGB, dst=image_small)
             
             # Reshape for clustering
             pixels = img_array.reshape(-1, 3)
             
             # Remove white/transparent background pixels
-            mask = np.sum(pixels, axis=1) < 750  # Not pure white
+            mask = pixels.sum(axis=1, dtype=np.uint16) < 750  # Not pure white; 3 x 255 fits in 16 bits
             filtered_pixels = pixels[mask]
             
             if len(filtered_pixels) == 0:
                 return {"colors": [], "dominant_color": "white"}
             
-            # K-means clustering for color extraction
-            kmeans = KMeans(n_clusters=min(num_colors, len(filtered_pixels)), random_state=42)
-            kmeans.fit(filtered_pixels)
+            # A solid-color garment is its mean color; clustering it would only
+            # split one color into near-identical shades
+            mean, std_dev = cv2.meanStdDev(filtered_pixels.reshape(-1, 1, 3))
+            if std_dev.max() < SOLID_COLOR_MAX_STD:
+                centers = mean.reshape(1, 3)
+                percentages = np.array([100.0])
+            else:
+                # K-means clustering for color extraction, seeded per call (OpenCV's RNG
+                # is per thread) so the same image always yields the same colors
+                n_clusters = min(num_colors, len(filtered_pixels))
+                criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, KMEANS_MAX_ITER, KMEANS_EPSILON)
+                cv2.setRNGSeed(KMEANS_SEED)
+                _, labels, centers = cv2.kmeans(
+                    filtered_pixels.astype(np.float32), n_clusters, None, criteria, 1, cv2.KMEANS_PP_CENTERS
+                )
+                percentages = np.bincount(labels.ravel(), minlength=n_clusters) / labels.size * 100
             
-            colors = []
-            for i, color in enumerate(kmeans.cluster_centers_):
-                color_rgb = tuple(map(int, color))
-                color_name = self._get_color_name(color_rgb)
-                percentage = np.sum(kmeans.labels_ == i) / len(kmeans.labels_) * 100
-                
-                colors.append({
+            # Order clusters by their rounded share, largest first (ties keep cluster
+            # order), before building the result
+            percentages = np.round(percentages, 2)
+            order = np.argsort(-percentages, kind='stable')
+            center_rgbs = [tuple(map(int, centers[i])) for i in order]
+            center_names = self._get_color_names(center_rgbs)
+            
+            colors = [
+                {
                     "rgb": color_rgb,
                     "hex": "#{:02x}{:02x}{:02x}".format(*color_rgb),
                     "name": color_name,
-                    "percentage": round(percentage, 2)
-                })
-            
-            # Sort by percentage
-            colors.sort(key=lambda x: x["percentage"], reverse=True)
+                    "percentage": percentage
+                }
+                for color_rgb, color_name, percentage in zip(center_rgbs, center_names, percentages[order])
+            ]
             
             return {
                 "colors": colors,
@@ -197,14 +425,13 @@ class ClothingDetectionService:
         except Exception as e:
             return {"colors": [], "dominant_color": "unknown", "error": str(e)}
     
-    async def predict_material(self, image: Image.Image) -> Dict:
+    def predict_material(self, gray_array: np.ndarray) -> Dict:
         """
-        Predict clothing material using image analysis
+        Predict clothing material from a grayscale image using texture analysis
+        
+        Blocking; call from a worker thread.
         """
         try:
-            # Convert to grayscale for texture analysis
-            gray = image.convert('L')
-            gray_array = np.array(gray)
             
             # Texture analysis features
             features = self._extract_texture_features(gray_array)
@@ -254,20 +481,14 @@ class ClothingDetectionService:
     
     def _map_yolo_to_clothing(self, class_id: int) -> Optional[str]:
         """Map YOLO class IDs to clothing categories"""
-        # This is a simplified mapping - you'd need to train a custom model
-        # or use a clothing-specific dataset
-        yolo_to_clothing = {
-            0: "t-shirt",  # person -> could be wearing t-shirt
-            # Add more mappings based on your model
-        }
-        return yolo_to_clothing.get(class_id)
+        return YOLO_TO_CLOTHING.get(class_id)
     
-    async def _rule_based_clothing_detection(self, image: Image.Image) -> Dict:
+    async def _rule_based_clothing_detection(self, image: np.ndarray) -> Dict:
         """
         Fallback rule-based clothing detection using image properties
         """
         # Analyze image dimensions and aspect ratio
-        width, height = image.size
+        height, width = image.shape[:2]
         aspect_ratio = width / height
         
         # Simple heuristics based on common clothing proportions
@@ -282,14 +503,17 @@ class ClothingDetectionService:
     
     def _extract_texture_features(self, gray_array: np.ndarray) -> Dict:
         """Extract texture features for material analysis"""
-        # Calculate various texture metrics
-        variance = np.var(gray_array)
+        # Calculate various texture metrics; mean and standard deviation come
+        # from a single pass, and the variance is derived from them
+        _, std_dev = cv2.meanStdDev(gray_array)
+        std_dev = std_dev[0, 0]
+        variance = std_dev * std_dev
         
         # Smoothness (inverse of variance)
         smoothness = 1 / (1 + variance)
         
         # Contrast using standard deviation
-        contrast = np.std(gray_array) / 255.0
+        contrast = std_dev / 255.0
         
         # Local binary pattern (simplified)
         lbp_variance = self._calculate_lbp_variance(gray_array)
@@ -304,50 +528,45 @@ class ClothingDetectionService:
     def _calculate_lbp_variance(self, gray_array: np.ndarray) -> float:
         """Calculate Local Binary Pattern variance for texture analysis"""
         try:
-            # Simplified LBP calculation
-            rows, cols = gray_array.shape
-            lbp = np.zeros((rows-2, cols-2))
+            if gray_array.shape[0] < 3 or gray_array.shape[1] < 3:
+                return 0.0
+            
+            # Simplified LBP: compare each interior pixel against its 8-neighborhood,
+            # taken as shifted views, with the top-left neighbor as the high bit
+            center = gray_array[1:-1, 1:-1]
+            neighbors = [
+                gray_array[:-2, :-2], gray_array[:-2, 1:-1], gray_array[:-2, 2:],
+                gray_array[1:-1, 2:], gray_array[2:, 2:], gray_array[2:, 1:-1],
+                gray_array[2:, :-2], gray_array[1:-1, :-2]
+            ]
             
-            for i in range(1, rows-1):
-                for j in range(1, cols-1):
-                    center = gray_array[i, j]
-                    binary_string = ""
-                    
-                    # 8-neighborhood
-                    neighbors = [
-                        gray_array[i-1, j-1], gray_array[i-1, j], gray_array[i-1, j+1],
-                        gray_array[i, j+1], gray_array[i+1, j+1], gray_array[i+1, j],
-                        gray_array[i+1, j-1], gray_array[i, j-1]
-                    ]
-                    
-                    for neighbor in neighbors:
-                        binary_string += '1' if neighbor >= center else '0'
-                    
-                    lbp[i-1, j-1] = int(binary_string, 2)
+            # OpenCV's compare/and/or write into two reused buffers, so no
+            # temporaries are allocated per neighbor
+            lbp = np.zeros(center.shape, dtype=np.uint8)
+            bits = np.empty(center.shape, dtype=np.uint8)
+            for bit, neighbor in zip(range(7, -1, -1), neighbors):
+                cv2.compare(neighbor, center, cv2.CMP_GE, dst=bits)
+                cv2.bitwise_and(bits, 1 << bit, dst=bits)
+                cv2.bitwise_or(lbp, bits, dst=lbp)
             
-            return np.var(lbp)
+            _, std_dev = cv2.meanStdDev(lbp)
+            return std_dev[0, 0] ** 2
             
         except Exception:
             return 0.0
     
     def _get_color_name(self, rgb_color: Tuple[int, int, int]) -> str:
         """Get closest color name for RGB value"""
-        try:
-            # Try to get exact match first
-            color_name = webcolors.rgb_to_name(rgb_color)
-            return color_name
-        except ValueError:
-            # Find closest color
-            min_distance = float('inf')
-            closest_color = 'unknown'
-            
-            for name, rgb in self.color_names.items():
-                distance = sum(abs(a - b) for a, b in zip(rgb_color, rgb))
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_color = name
-            
-            return closest_color
+        return self._get_color_names([rgb_color])[0]
+    
+    def _get_color_names(self, rgb_colors: List[Tuple[int, int, int]]) -> List[str]:
+        """Get the closest palette color name for each RGB value, by Manhattan distance"""
+        if not rgb_colors:
+            return []
+        
+        queries = np.asarray(rgb_colors, dtype=np.int16)
+        distances = np.abs(self._palette_rgb[None, :, :] - queries[:, None, :]).sum(axis=2)
+        return [self._palette_names[i] for i in distances.argmin(axis=1)]
     
     def _calculate_overall_confidence(self, clothing_type: Dict, colors: Dict, material: Dict) -> float:
         """Calculate overall confidence score for clothing analysis"""
@@ -357,5 +576,47 @@ class ClothingDetectionService:
         
         return (type_confidence + color_confidence + material_confidence) / 3.0
 
+def detection_export_format() -> str:
+    """YOLO export format for this host: TensorRT with CUDA, OpenVINO otherwise"""
+    return "engine" if torch.cuda.is_available() else "openvino"
+
+def exported_model_path(export_format: str) -> str:
+    """Path of the exported YOLO model for an export format"""
+    stem = os.path.splitext(DETECTION_WEIGHTS)[0]
+    if export_format == "engine":
+        return os.path.join(EXPORTED_MODEL_DIR, f"{stem}.engine")
+    return os.path.join(EXPORTED_MODEL_DIR, f"{stem}_{export_format}_model")
+
+def export_detection_model() -> str:
+    """
+    Export the YOLO weights to this host's inference runtime at FP16
+    
+    Run once offline (python -m services.clothing_detection); the service
+    loads the export on its next start. Engines are built for the host's GPU
+    and must be re-exported on different hardware.
+    
+    Returns:
+        Path of the exported model
+    """
+    export_format = detection_export_format()
+    exported = YOLO(DETECTION_WEIGHTS).export(
+        format=export_format,
+        half=True,
+        imgsz=DETECTION_IMAGE_SIZE,
+        dynamic=True,
+        batch=DETECTION_MAX_BATCH
+    )
+    
+    # Ultralytics writes the export next to the weights
+    model_output = exported_model_path(export_format)
+    os.makedirs(EXPORTED_MODEL_DIR, exist_ok=True)
+    if os.path.isdir(model_output):
+        shutil.rmtree(model_output)
+    shutil.move(exported, model_output)
+    return model_output
+
 # Global instance
-clothing_detection_service = ClothingDetectionService()
\ No newline at end of file
+clothing_detection_service = ClothingDetectionService()
+
+if __name__ == "__main__":
+    print(f"Exported {DETECTION_WEIGHTS} -> {export_detection_model()}")
\ No newline at end of file
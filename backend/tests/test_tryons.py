@@ -0,0 +1,38 @@
+import asyncio
+import numpy as np
+
+from api.tryons import _generate_virtual_tryon
+
+def _body_model(vertices, faces):
+    return {
+        "mesh_data": {
+            "vertices": vertices.tolist(),
+            "faces": faces.tolist(),
+            "format": "obj_compatible"
+        },
+        "model_params": {"shape_parameters": {"height_scale": 1.1, "shoulder_width_scale": 0.9}},
+        "landmarks": {}
+    }
+
+def test_generate_virtual_tryon_with_mesh():
+    vertices = np.array([[-1.0, 0.0, -0.5], [1.0, 2.0, 0.5], [0.0, 1.0, 0.25]])
+    faces = np.array([[0, 1, 2]])
+    body_model = _body_model(vertices, faces)
+    
+    result = asyncio.run(_generate_virtual_tryon(body_model, (vertices, faces), ["shirt"]))
+    
+    assert result["body_mesh"] == body_model["mesh_data"]
+    assert result["body_bounds"] == {
+        "min": {"x": -1.0, "y": 0.0, "z": -0.5},
+        "max": {"x": 1.0, "y": 2.0, "z": 0.5}
+    }
+    assert result["scale_factor"] == 1.1
+    assert [mesh["clothing_id"] for mesh in result["clothing_meshes"]] == ["shirt"]
+
+def test_generate_virtual_tryon_without_mesh():
+    body_model = {"model_params": {}, "landmarks": {}}
+    
+    result = asyncio.run(_generate_virtual_tryon(body_model, None, []))
+    
+    assert result["body_mesh"] == {}
+    assert result["body_bounds"] == {"min": {"x": -1, "y": 0, "z": -1}, "max": {"x": 1, "y": 2, "z": 1}}
@@ -0,0 +1,177 @@
+import copy
+import io
+import os
+import numpy as np
+import orjson
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from utils.file_io import run_io, read_bytes, write_bytes_atomic_sync
+
+BODY_MODELS_DIR = Path("uploads/body_models")
+BODY_MODELS_DIR.mkdir(parents=True, exist_ok=True)
+
+BODY_MODEL_CACHE_SIZE = 256
+
+# Recently used models by ID: the parsed document, its mesh arrays once
+# loaded, and the document mtime they were read at
+_cache: "OrderedDict[str, Dict]" = OrderedDict()
+
+def model_path_for(model_id: str) -> Path:
+    """Path of the body model document (everything except the mesh arrays)"""
+    return BODY_MODELS_DIR / f"{model_id}_model.json"
+
+def mesh_path_for(model_id: str) -> Path:
+    """Path of the binary vertex/face arrays"""
+    return BODY_MODELS_DIR / f"{model_id}_mesh.npz"
+
+async def save_body_model(model_id: str, body_model: Dict, include_mesh: bool = True) -> int:
+    """
+    Persist a body model as a compact JSON document plus an NPZ mesh
+    
+    Args:
+        model_id: Body model ID
+        body_model: Model data as returned by the body modeling service
+        include_mesh: Set to False when the mesh is unchanged, so only the
+            small JSON document is rewritten
+            
+    Returns:
+        Size in bytes of the written JSON document
+    """
+    mesh_data = body_model.get("mesh_data") or {}
+    document = {
+        **body_model,
+        "mesh_data": {k: v for k, v in mesh_data.items() if k not in ("vertices", "faces")}
+    }
+    
+    mesh = None
+    if include_mesh and "vertices" in mesh_data:
+        mesh = mesh_data["vertices"], mesh_data["faces"]
+    
+    # Both files are written in a single worker-thread hop
+    document_size = await run_io(_write_model_sync, model_id, document, mesh)
+    invalidate_body_model(model_id)
+    return document_size
+
+async def load_body_model(model_id: str, include_mesh: bool = True) -> Dict:
+    """
+    Load a body model, re-attaching vertices and faces from the NPZ mesh
+    
+    Models saved before the mesh was split out still carry the arrays in
+    their JSON document and are returned unchanged.
+    """
+    body_model, _ = await load_body_model_with_mesh(model_id, include_mesh)
+    return body_model
+
+async def load_body_model_with_mesh(
+    model_id: str, 
+    include_mesh: bool = True
+) -> Tuple[Dict, Optional[Tuple[np.ndarray, np.ndarray]]]:
+    """
+    Load a body model together with its mesh arrays, both from one snapshot
+    
+    Returns:
+        The model as load_body_model returns it, and (vertices, faces) as
+        read-only arrays, or None if the model has no mesh or include_mesh
+        is False
+    """
+    entry = await _load_cached(model_id, include_mesh)
+    body_model = copy.deepcopy(entry["document"])
+    
+    mesh_data = body_model.get("mesh_data")
+    if include_mesh and mesh_data is not None and "vertices" not in mesh_data:
+        vertices, faces = entry["mesh"]
+        mesh_data["vertices"] = vertices.tolist()
+        mesh_data["faces"] = faces.tolist()
+    
+    return body_model, entry["mesh"] if include_mesh else None
+
+async def load_body_mesh(model_id: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Load only the mesh arrays of a body model, without converting them to lists
+    
+    Returns:
+        (vertices, faces), or None if the model has no mesh
+    """
+    entry = await _load_cached(model_id, include_mesh=True)
+    return entry["mesh"]
+
+def invalidate_body_model(model_id: str):
+    """Drop a model from the in-process cache after it is changed or deleted"""
+    _cache.pop(model_id, None)
+
+async def latest_body_model_id() -> Optional[str]:
+    """ID of the most recently created body model, or None if there are none"""
+    return await run_io(_latest_body_model_id_sync)
+
+async def _load_cached(model_id: str, include_mesh: bool) -> Dict:
+    """
+    Return the cache entry for a model, reading from disk only if the
+    document changed since it was cached
+    
+    Cached documents and arrays are shared, so callers must copy before
+    modifying them.
+    """
+    path = model_path_for(model_id)
+    mtime_ns = (await run_io(os.stat, path)).st_mtime_ns
+    
+    entry = _cache.get(model_id)
+    if entry is None or entry["mtime_ns"] != mtime_ns:
+        entry = {
+            "mtime_ns": mtime_ns,
+            "document": orjson.loads(await read_bytes(path)),
+            "mesh": None
+        }
+        _cache[model_id] = entry
+        if len(_cache) > BODY_MODEL_CACHE_SIZE:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(model_id)
+    
+    mesh_data = entry["document"].get("mesh_data")
+    if include_mesh and entry["mesh"] is None and mesh_data is not None:
+        if "vertices" in mesh_data:
+            mesh = np.asarray(mesh_data["vertices"]), np.asarray(mesh_data["faces"])
+        else:
+            mesh = await run_io(_read_mesh_sync, mesh_path_for(model_id))
+        
+        for array in mesh:
+            array.flags.writeable = False
+        entry["mesh"] = mesh
+    
+    return entry
+
+def _latest_body_model_id_sync() -> Optional[str]:
+    """Find the newest model document in a single scandir pass"""
+    try:
+        with os.scandir(BODY_MODELS_DIR) as entries:
+            latest = max(
+                (entry for entry in entries if entry.name.endswith("_model.json")),
+                key=lambda entry: entry.stat().st_ctime,
+                default=None
+            )
+    except FileNotFoundError:
+        return None
+    
+    return latest.name[:-len("_model.json")] if latest is not None else None
+
+def _write_model_sync(model_id: str, document: Dict, mesh: Optional[Tuple]) -> int:
+    """Write the mesh, then the document, so a document on disk always has its mesh"""
+    if mesh is not None:
+        _write_mesh_sync(mesh_path_for(model_id), *mesh)
+    
+    document_bytes = orjson.dumps(document, option=orjson.OPT_SERIALIZE_NUMPY)
+    write_bytes_atomic_sync(model_path_for(model_id), document_bytes)
+    return len(document_bytes)
+
+def _write_mesh_sync(path: Path, vertices, faces):
+    """Serialize mesh arrays to NPZ and write them atomically"""
+    buffer = io.BytesIO()
+    np.savez(buffer, vertices=np.asarray(vertices), faces=np.asarray(faces))
+    write_bytes_atomic_sync(path, buffer.getvalue())
+
+def _read_mesh_sync(path: Path) -> Tuple[np.ndarray, np.ndarray]:
+    """Read mesh arrays from NPZ"""
+    with np.load(path) as mesh:
+        return mesh["vertices"], mesh["faces"]
@@ -0,0 +1,131 @@
+import asyncio
+import glob
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, List, Optional, Union
+import aiofiles
+from fastapi import HTTPException, UploadFile
+
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+DEFAULT_MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+
+# Shared pool for blocking file I/O, so it neither fragments across handlers
+# nor competes with other work queued on the default executor
+IO_EXECUTOR = ThreadPoolExecutor(
+    max_workers=min(32, (os.cpu_count() or 1) * 4),
+    thread_name_prefix="io"
+)
+
+# Leading bytes of the image formats accepted for upload
+IMAGE_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": ".png",
+    b"\xff\xd8\xff": ".jpg",
+    b"GIF87a": ".gif",
+    b"GIF89a": ".gif"
+}
+
+async def run_io(fn: Callable, *args) -> Any:
+    """Run a blocking I/O call on the shared I/O thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(IO_EXECUTOR, fn, *args)
+
+def submit_io(fn: Callable, *args) -> asyncio.Future:
+    """
+    Start a blocking I/O call on the shared pool immediately
+    
+    Unlike run_io, the call is already running before the returned future is
+    awaited, so it overlaps with CPU-bound work that never yields to the loop.
+    """
+    return asyncio.get_running_loop().run_in_executor(IO_EXECUTOR, fn, *args)
+
+async def sniff_image_extension(file: UploadFile) -> Optional[str]:
+    """
+    Identify an uploaded image from its magic bytes
+    
+    Returns:
+        Extension for the detected format, or None if it is not a supported image
+    """
+    header = await file.read(12)
+    await file.seek(0)
+    
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return ".webp"
+    
+    for signature, ext in IMAGE_SIGNATURES.items():
+        if header.startswith(signature):
+            return ext
+    
+    return None
+
+async def iter_upload_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    """Yield an uploaded file in UPLOAD_CHUNK_SIZE chunks, enforcing MAX_FILE_SIZE"""
+    max_size = int(os.getenv("MAX_FILE_SIZE", DEFAULT_MAX_FILE_SIZE))
+    size = 0
+    
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_size:
+            raise HTTPException(status_code=413, detail="File too large")
+        yield chunk
+
+async def read_upload(file: UploadFile) -> bytes:
+    """Read an uploaded file into memory in chunks, enforcing MAX_FILE_SIZE"""
+    return b"".join([chunk async for chunk in iter_upload_chunks(file)])
+
+async def save_upload(file: UploadFile, path: Union[str, Path]) -> bytes:
+    """
+    Stream an uploaded file to disk in chunks
+    
+    A partial file is removed if the upload fails for any reason, including
+    the size limit, a client disconnect or cancellation.
+    
+    Args:
+        file: Incoming upload
+        path: Destination path on disk
+        
+    Returns:
+        Full file contents, for services that need the raw bytes
+    """
+    chunks = []
+    
+    try:
+        async with aiofiles.open(path, 'wb', buffering=UPLOAD_CHUNK_SIZE) as f:
+            async for chunk in iter_upload_chunks(file):
+                await f.write(chunk)
+                chunks.append(chunk)
+    except BaseException:
+        Path(path).unlink(missing_ok=True)
+        raise
+    
+    return b"".join(chunks)
+
+async def read_bytes(path: Union[str, Path]) -> bytes:
+    """Read a small file in a single worker-thread hop"""
+    return await run_io(Path(path).read_bytes)
+
+async def write_bytes(path: Union[str, Path], data: bytes) -> None:
+    """Write a small file in a single worker-thread hop"""
+    await run_io(Path(path).write_bytes, data)
+
+async def write_bytes_atomic(path: Union[str, Path], data: bytes) -> None:
+    """Write a file via a temporary sibling and os.replace so readers never see a partial file"""
+    await run_io(write_bytes_atomic_sync, path, data)
+
+def write_bytes_atomic_sync(path: Union[str, Path], data: bytes) -> None:
+    """Blocking variant of write_bytes_atomic for code already running in a worker thread"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+async def delete_by_id(directory: Union[str, Path], file_id: str) -> List[str]:
+    """Delete every file named {file_id}_* in directory, returning the deleted filenames"""
+    return await run_io(_delete_by_id_sync, Path(directory), file_id)
+
+def _delete_by_id_sync(directory: Path, file_id: str) -> List[str]:
+    deleted = []
+    for path in directory.glob(f"{glob.escape(file_id)}_*"):
+        path.unlink(missing_ok=True)
+        deleted.append(path.name)
+    return deleted
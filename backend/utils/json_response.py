@@ -0,0 +1,50 @@
+from typing import Any
+import gzip
+import orjson
+from fastapi.responses import ORJSONResponse, Response
+
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_SIZE = 1024
+
+class PrettyORJSONResponse(ORJSONResponse):
+    """ORJSONResponse indented for reading in a browser or terminal"""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_INDENT_2
+        )
+
+def json_response(content: Any, pretty: bool = False) -> ORJSONResponse:
+    """
+    Build a JSON response, compact unless the client asked for ?pretty=1
+    
+    Args:
+        content: Response body
+        pretty: Indent the output for debugging
+    """
+    if pretty:
+        return PrettyORJSONResponse(content=content)
+    return ORJSONResponse(content=content)
+
+def compressed_json_response(content: Any, accept_encoding: str = "") -> Response:
+    """
+    Build a JSON response, gzip-compressed when the client accepts it
+    
+    Meant for large, float-heavy payloads such as meshes
+    
+    Args:
+        content: Response body
+        accept_encoding: The request's Accept-Encoding header
+    """
+    body = orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    
+    # Both variants depend on Accept-Encoding, so shared caches must key on it either way
+    if "gzip" not in accept_encoding or len(body) < GZIP_MIN_SIZE:
+        return Response(content=body, media_type="application/json", headers={"Vary": "Accept-Encoding"})
+    
+    return Response(
+        content=gzip.compress(body, compresslevel=5),
+        media_type="application/json",
+        headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+    )